@@ -0,0 +1,103 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from PyQt5 import QtCore, QtGui
+
+
+def decode(path):  # QImage decoding is thread-safe, unlike QPixmap
+    start = time.perf_counter()
+    image = QtGui.QImage(path)
+    return path, image, time.perf_counter() - start
+
+
+class SpriteCache:
+    # Process-wide registry of decoded sprites keyed by file path. QImage is implicitly
+    # shared, so every tile and unit gets the same pixel data without copying it.
+    def __init__(self):
+        self.images = {}
+        self.atlas = {}  # sprite path -> (atlas page path, QRect), see use_atlas()
+        self.loads = 0  # files decoded from disk
+        self.hits = 0  # requests served from the cache
+        self.load_time = 0.0  # seconds spent decoding
+
+    def image(self, path) -> QtGui.QImage:
+        image = self.images.get(path)
+        if image is not None:
+            self.hits += 1
+            return image
+
+        if path in self.atlas:  # cut out of the decoded atlas page
+            page, rect = self.atlas[path]
+            image = self.image(page).copy(rect)
+            self.images[path] = image
+            return image
+
+        start = time.perf_counter()
+        image = QtGui.QImage(path)
+        self.load_time += time.perf_counter() - start
+        self.loads += 1
+        self.images[path] = image
+        return image
+
+    def use_atlas(self, index_path):  # serve the sprites packed by atlas.py from their atlas pages
+        with open(index_path) as index_file:
+            index = json.load(index_file)
+        for path, (page, x, y, width, height) in index["sprites"].items():
+            self.atlas[path] = (index["pages"][page], QtCore.QRect(x, y, width, height))
+
+    def source(self, path):  # file which has to be decoded to get the sprite
+        return self.atlas[path][0] if path in self.atlas else path
+
+    def preload(self, paths, workers=None):  # start decoding paths on a thread pool
+        files = dict.fromkeys(self.source(path) for path in paths)
+        return Preload(self, [path for path in files if path not in self.images], workers)
+
+    def clear(self):
+        self.images.clear()
+
+    def stats(self):
+        return {"loads": self.loads,
+                "hits": self.hits,
+                "cached": len(self.images),
+                "load_time": self.load_time,
+                "bytes": sum(image.sizeInBytes() for image in self.images.values())}
+
+
+class Preload:
+    # Sprites being decoded in the background. The GUI thread polls progress() and the
+    # decoded images are moved into the cache there, so the cache is only touched by it.
+    def __init__(self, cache, paths, workers=None):
+        self.cache = cache
+        self.total = len(paths)
+        self.loaded = 0
+        executor = ThreadPoolExecutor(max_workers=workers)
+        self.futures = [executor.submit(decode, path) for path in paths]
+        executor.shutdown(wait=False)
+
+    def collect(self):
+        pending = []
+        for future in self.futures:
+            if not future.done():
+                pending.append(future)
+                continue
+            path, image, load_time = future.result()
+            self.cache.images.setdefault(path, image)
+            self.cache.loads += 1
+            self.cache.load_time += load_time
+            self.loaded += 1
+        self.futures = pending
+
+    def progress(self) -> float:  # part of the sprites already decoded
+        self.collect()
+        return self.loaded / self.total if self.total else 1.0
+
+    def done(self) -> bool:
+        return self.progress() == 1.0
+
+    def wait(self):
+        wait(self.futures)
+        self.collect()
+
+
+sprites = SpriteCache()
@@ -0,0 +1,87 @@
+import argparse
+import glob
+import json
+import os
+
+from PyQt5 import QtCore, QtGui
+
+INDEX_PATH = "Sprites/atlas.json"
+PAGE_SIZE = 2048  # width and max height of an atlas page
+PADDING = 1  # transparent pixels around each sprite, so that filtering does not bleed the neighbours in
+
+
+def pack(sizes, page_size=PAGE_SIZE, padding=PADDING):
+    # Shelf packing: sprites go left to right in rows, tallest first. Returns the
+    # (page, x, y) of every size in the input order and the height used on each page.
+    order = sorted(range(len(sizes)), key=lambda n: (-sizes[n][1], -sizes[n][0]))
+    positions = [None] * len(sizes)
+    heights = [0]
+    x = y = shelf_height = 0
+    for n in order:
+        width, height = sizes[n][0] + 2 * padding, sizes[n][1] + 2 * padding
+        if width > page_size or height > page_size:
+            raise ValueError("Sprite of %dx%d does not fit on a %d atlas page" % (sizes[n] + (page_size,)))
+        if x + width > page_size:  # next shelf
+            x, y, shelf_height = 0, y + shelf_height, 0
+        if y + height > page_size:  # next page
+            heights.append(0)
+            x = y = shelf_height = 0
+        positions[n] = (len(heights) - 1, x + padding, y + padding)
+        x += width
+        shelf_height = max(shelf_height, height)
+        heights[-1] = max(heights[-1], y + shelf_height)
+    return positions, heights
+
+
+def paint_pages(images, positions, heights, width):  # QImage pages with the images drawn at their positions
+    pages = []
+    for height in heights:
+        page = QtGui.QImage(width, max(height, 1), QtGui.QImage.Format.Format_ARGB32_Premultiplied)
+        page.fill(QtCore.Qt.GlobalColor.transparent)
+        pages.append(page)
+    painters = [QtGui.QPainter(page) for page in pages]
+    for image, (page, x, y) in zip(images, positions):
+        painters[page].drawImage(x, y, image)
+    for painter in painters:
+        painter.end()
+    return pages
+
+
+def build_atlas(paths, index_path=INDEX_PATH, page_size=PAGE_SIZE):  # pack sprite files into atlas pages
+    images = [QtGui.QImage(path) for path in paths]
+    limit = page_size // 2  # bigger images, like the end game background, stay separate files
+    sprites = [(path, image) for path, image in zip(paths, images)
+               if not image.isNull() and image.width() <= limit and image.height() <= limit]
+    positions, heights = pack([(image.width(), image.height()) for path, image in sprites], page_size)
+    width = max((x + image.width() + PADDING for (path, image), (page, x, y) in zip(sprites, positions)), default=1)
+    pages = paint_pages([image for path, image in sprites], positions, heights, min(width, page_size))
+
+    prefix = os.path.splitext(index_path)[0]
+    page_paths = ["%s_%d.png" % (prefix, n) for n in range(len(pages))]
+    for page, page_path in zip(pages, page_paths):
+        page.save(page_path)
+    index = {"pages": page_paths,
+             "sprites": {path: [page, x, y, image.width(), image.height()]
+                         for (path, image), (page, x, y) in zip(sprites, positions)}}
+    with open(index_path, "w") as index_file:
+        json.dump(index, index_file, indent=1)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack the game sprites into atlas pages with a sub-rect index.")
+    parser.add_argument("--sprites", default="Sprites", help="directory with the sprite PNGs")
+    parser.add_argument("-o", "--index", default=INDEX_PATH, help="JSON index, pages are written next to it")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    args = parser.parse_args()
+
+    prefix = os.path.splitext(os.path.basename(args.index))[0]
+    paths = sorted(path.replace(os.sep, "/") for path in glob.glob(os.path.join(args.sprites, "**", "*.png"),
+                                                                   recursive=True)
+                   if not os.path.basename(path).startswith(prefix + "_"))
+    index = build_atlas(paths, args.index, args.page_size)
+    print("%d sprites packed into %d pages" % (len(index["sprites"]), len(index["pages"])))
+
+
+if __name__ == "__main__":
+    main()
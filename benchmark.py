@@ -0,0 +1,196 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from simulation import Simulation
+
+# (name, wave the scenario starts at, number of towers)
+SIMULATION_SCENARIOS = [
+    ("wave_1_towers_5", 1, 5),
+    ("wave_10_towers_5", 10, 5),
+    ("wave_50_towers_5", 50, 5),
+    ("wave_1_towers_50", 1, 50),
+    ("wave_10_towers_50", 10, 50),
+    ("wave_50_towers_50", 50, 50),
+]
+PAINT_SCENARIOS = [
+    ("wave_1_towers_5", 1, 5),
+    ("wave_10_towers_5", 10, 5),
+    ("wave_50_towers_5", 50, 5),
+]
+
+WARMUP_TICKS = 200
+
+# metric name suffix -> True when a bigger value is better
+HIGHER_IS_BETTER = {"ticks_per_second": True, "ms_per_frame": False, "seconds": False}
+
+
+def tower_coordinates(sim, count):  # tower places first, then squares next to the road
+    coordinates = [list(place) for place in sim.tower_places]
+    road = {tuple(coord) for coord in sim.road}
+    for i in range(sim.map.rows):
+        for j in range(sim.map.columns):
+            if len(coordinates) >= count:
+                break
+            if (i, j) not in road and [i, j] not in coordinates:
+                coordinates.append([i, j])
+    return coordinates[:count]
+
+
+def scenario(wave, towers, seed=0):  # a game right before the given wave, with towers and an endless castle
+    sim = Simulation(seed)
+    sim.start_delay = 0
+    sim.wave_level = wave - 1
+    sim.money_count = 10 ** 9
+    for n, coord in enumerate(tower_coordinates(sim, towers)):
+        if n % 2 == 0:
+            sim.buy_archer(coord)
+        else:
+            sim.buy_wizard(coord)
+    sim.castleHP = 10 ** 12
+    sim.step(WARMUP_TICKS)  # let the wave reach the towers before measuring
+    return sim
+
+
+def bench_simulation(wave, towers, ticks, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        sim = scenario(wave, towers)
+        start = time.perf_counter()
+        sim.step(ticks)
+        best = min(best, time.perf_counter() - start)
+    return ticks / best
+
+
+def bench_paint(wave, towers, frames, repeat):
+    from PyQt5 import QtGui
+    import main
+
+    window = main.MainWindow()
+    window.board.finish_loading()
+    window.board.timer.stop()
+    sim = scenario(wave, towers)
+    window.board.simulation = sim
+    target = QtGui.QPixmap(window.board.size())
+    window.board.render(target)  # warm up the background and sprite caches
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for frame in range(frames):
+            window.board.interpolation = frame / frames
+            window.board.render(target)
+        best = min(best, time.perf_counter() - start)
+    window.close()
+    return best / frames * 1000
+
+
+def startup_probe():  # run in a child process: show MainWindow and report once the board is painted
+    from PyQt5 import QtCore, QtWidgets
+    import main
+
+    app = QtWidgets.QApplication(sys.argv[:1])
+
+    class FirstFrame(QtCore.QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QtCore.QEvent.Type.Paint:
+                QtCore.QTimer.singleShot(0, app.quit)
+            return False
+
+    window = main.MainWindow()
+    first_frame = FirstFrame()
+    window.board.installEventFilter(first_frame)
+    app.exec_()
+    print("first frame", flush=True)
+
+
+def bench_startup(repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, os.path.abspath(__file__), "--startup-probe"], check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(groups, repeat, ticks, frames):
+    results = {"meta": {"python": platform.python_version(), "numpy": np.__version__,
+                        "machine": platform.machine(), "processor": platform.processor(),
+                        "time": time.strftime("%Y-%m-%dT%H:%M:%S")}}
+    if "simulation" in groups:
+        results["simulation"] = {name + ".ticks_per_second": bench_simulation(wave, towers, ticks, repeat)
+                                 for name, wave, towers in SIMULATION_SCENARIOS}
+    if "paint" in groups:
+        from PyQt5 import QtWidgets
+        app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv[:1])
+        results["paint"] = {name + ".ms_per_frame": bench_paint(wave, towers, frames, repeat)
+                            for name, wave, towers in PAINT_SCENARIOS}
+    if "startup" in groups:
+        results["startup"] = {"first_frame.seconds": bench_startup(repeat)}
+    return results
+
+
+def compare(results, baseline, threshold):  # list of (metric, baseline, current, change) that got worse
+    regressions = []
+    for group, metrics in results.items():
+        if group == "meta":
+            continue
+        for metric, value in metrics.items():
+            old = baseline.get(group, {}).get(metric)
+            if old is None or old == 0:
+                continue
+            change = (value - old) / old
+            higher_is_better = HIGHER_IS_BETTER[metric.rsplit(".", 1)[1]]
+            if (higher_is_better and change < -threshold) or (not higher_is_better and change > threshold):
+                regressions.append((group + "/" + metric, old, value, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure simulation throughput, paint time and startup time.")
+    parser.add_argument("-o", "--output", default="benchmark.json", help="JSON file with the results")
+    parser.add_argument("--only", default="simulation,paint,startup",
+                        help="comma-separated groups to run: simulation, paint, startup")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, the best one is kept")
+    parser.add_argument("--ticks", type=int, default=2000, help="simulation ticks per run")
+    parser.add_argument("--frames", type=int, default=100, help="painted frames per run")
+    parser.add_argument("--compare", metavar="BASELINE", default=None,
+                        help="stored results to compare with, exits with 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative change counted as a regression")
+    parser.add_argument("--startup-probe", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))  # sprites are loaded by relative paths
+    if args.startup_probe:
+        startup_probe()
+        return
+
+    results = run(args.only.split(","), args.repeat, args.ticks, args.frames)
+    with open(args.output, "w") as output:
+        json.dump(results, output, indent=2)
+    for group, metrics in results.items():
+        if group != "meta":
+            for metric, value in metrics.items():
+                print("%-45s %12.3f" % (group + "/" + metric, value))
+
+    if args.compare is not None:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(results, baseline, args.threshold)
+        for metric, old, new, change in regressions:
+            print("REGRESSION %s: %.3f -> %.3f (%+.1f%%)" % (metric, old, new, change * 100))
+        if regressions:
+            sys.exit(1)
+        print("no regressions against " + args.compare)
+
+
+if __name__ == "__main__":
+    main()
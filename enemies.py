@@ -0,0 +1,27 @@
+from stores import ArrayStore
+
+
+class EnemyStore(ArrayStore):
+    # Struct-of-arrays storage of the enemies on the road. Row i of every array describes
+    # the same enemy; rows [0, count) are alive and kept in spawn order, so the first row
+    # in range is the enemy which came first, like in the list of UFO objects it replaces.
+    # uid numbers the enemies in spawn order, so it stays sorted for np.searchsorted.
+    fields = ("path_index", "previous_path_index", "HP", "level", "velocity", "force", "money_award", "uid")
+
+    def __init__(self, capacity=64):
+        super().__init__(capacity)
+        self.next_uid = 0
+
+    def spawn(self, level, path_index=0):
+        self.reserve(1)
+        i = self.count
+        self.path_index[i] = path_index
+        self.previous_path_index[i] = path_index  # position before the last tick, for interpolated drawing
+        self.level[i] = level
+        self.HP[i] = 30 * level
+        self.velocity[i] = level + 2  # 1 square in 3, 4, 5, 6... iteration
+        self.force[i] = 10 * level  # 10, 20, 30... damage for the castle
+        self.money_award[i] = 20 * level
+        self.uid[i] = self.next_uid
+        self.next_uid += 1
+        self.count += 1
@@ -0,0 +1,114 @@
+import heapq
+from collections import deque
+
+import numpy as np
+
+UNREACHABLE = np.iinfo(np.int32).max
+
+
+class FlowField:
+    # Distance to the castle of every road square, found by a BFS from the castle over the
+    # road links, and the next square on a shortest way there. Every enemy shares it, so
+    # a move is one lookup in next_cell whatever the size of the map or the enemy count.
+    # Squares are numbered like GameMap.road, an enemy's path_index is its square's number.
+    def __init__(self, game_map):
+        self.squares = game_map.road
+        self.index = {square: n for n, square in enumerate(self.squares)}
+        self.links = [[self.index[other] for other in game_map.links(square)] for square in self.squares]
+        self.target = self.index[game_map.castle]
+        self.blocked = np.zeros(len(self.squares), dtype=bool)
+        self.distance = np.full(len(self.squares), UNREACHABLE, dtype=np.int32)
+        self.next_cell = np.arange(len(self.squares), dtype=np.int32)  # itself at the castle or with no way there
+        self.compute()
+
+    def compute(self):  # the whole field from scratch
+        self.distance[:] = UNREACHABLE
+        self.distance[self.target] = 0
+        queue = deque([self.target])
+        while queue:
+            cell = queue.popleft()
+            for other in self.links[cell]:
+                if self.distance[other] == UNREACHABLE and not self.blocked[other]:
+                    self.distance[other] = self.distance[cell] + 1
+                    queue.append(other)
+        for cell in range(len(self.squares)):
+            self.point(cell)
+
+    def clear(self):  # open every blocked square
+        if self.blocked.any():
+            self.blocked[:] = False
+            self.compute()
+
+    def point(self, cell):  # aim next_cell of cell at its neighbour closest to the castle
+        best = cell
+        best_distance = self.distance[cell] if not self.blocked[cell] else UNREACHABLE
+        for other in self.links[cell]:
+            if self.distance[other] < best_distance:
+                best, best_distance = other, self.distance[other]
+        self.next_cell[cell] = best
+
+    def block(self, square):  # make a road square impassable, returns the cells whose way changed
+        cell = self.index[tuple(square)]
+        if self.blocked[cell] or cell == self.target:  # the castle stays open
+            return []
+        self.blocked[cell] = True
+        return self.refill(self.subtree(cell))  # only the ways through the blocked square change
+
+    def subtree(self, cell):  # cell and the cells whose next_cell chain runs through it
+        cells = [cell]
+        members = {cell}
+        queue = deque([cell])
+        while queue:
+            current = queue.popleft()
+            for other in self.links[current]:
+                if other not in members and self.next_cell[other] == current:
+                    members.add(other)
+                    cells.append(other)
+                    queue.append(other)
+        return cells
+
+    def refill(self, cells):  # recompute the distances of cells from the rest of the field
+        members = set(cells)
+        self.distance[cells] = UNREACHABLE
+        heap = []
+        for cell in cells:
+            if self.blocked[cell]:
+                continue
+            outside = [self.distance[other] for other in self.links[cell]
+                       if other not in members and self.distance[other] != UNREACHABLE]
+            if outside:
+                heap.append((min(outside) + 1, cell))
+        heapq.heapify(heap)
+        while heap:
+            distance, cell = heapq.heappop(heap)
+            if distance >= self.distance[cell]:
+                continue
+            self.distance[cell] = distance
+            for other in self.links[cell]:
+                if other in members and not self.blocked[other] and distance + 1 < self.distance[other]:
+                    heapq.heappush(heap, (distance + 1, other))
+        for cell in cells:
+            self.point(cell)
+        return cells
+
+    def unblock(self, square):  # make a blocked road square passable again, returns the changed cells
+        cell = self.index[tuple(square)]
+        if not self.blocked[cell]:
+            return []
+        self.blocked[cell] = False
+
+        # distances can only shrink, spread the shorter ones out from the opened square
+        changed = [cell]
+        self.distance[cell] = min((self.distance[other] + 1 for other in self.links[cell]
+                                   if self.distance[other] != UNREACHABLE), default=UNREACHABLE)
+        queue = deque([cell] if self.distance[cell] != UNREACHABLE else [])
+        while queue:
+            current = queue.popleft()
+            for other in self.links[current]:
+                if not self.blocked[other] and self.distance[current] + 1 < self.distance[other]:
+                    self.distance[other] = self.distance[current] + 1
+                    changed.append(other)
+                    queue.append(other)
+        for other in set(changed):
+            self.point(other)
+        return changed
@@ -1,802 +1,1121 @@
-import math
-
-import numpy as np
-import copy
-import os
-import sys
-from math import sqrt
-from PyQt5 import QtGui, QtCore, QtWidgets, QtMultimedia
-from PyQt5.Qt import QTransform
-from PyQt5.QtWidgets import QApplication, QMainWindow, QPushButton, QLabel, QVBoxLayout, QWidget
-
-
-class Board(QtWidgets.QFrame):
-    SPEED = 100
-
-    WIDTHINBLOCKS = 8
-    HEIGHTINBLOCKS = 7
-    max_possible_level = 7  # max possible level of enemies
-
-    def __init__(self, parent):
-        super(Board, self).__init__(parent)
-        self.coins = QtGui.QImage("Sprites/coins.png")
-        self.menu = QtGui.QImage("Sprites/menu.png")
-        self.heart = QtGui.QImage("Sprites/heart.png")
-        self.wave_menu = QtGui.QImage("Sprites/wave_level.png")
-        self.alien = QtGui.QImage("Sprites/alien.png")
-        self.arrow = QtGui.QImage("Sprites/Towers/Archer/arrow.png")
-        self.end_menu_background = QtGui.QImage("Sprites/endgame_background.png")
-
-        self.player = QtMultimedia.QMediaPlayer()
-        url = QtCore.QUrl.fromLocalFile("soundtrack.mp3")
-        content = QtMultimedia.QMediaContent(url)
-        self.player.setMedia(content)
-        self.player.play()
-
-        self.combo = BuyMenu()
-        self.upgrade = UpgradeMenu()
-
-        self.tower_places = [[6, 1], [7, 3], [17, 1], [13, 4], [11, 7]]
-
-        self.enemies = []
-        self.enemies_in_reserve = []  # levels of enemies which were generated by wave
-                                      # and now are waiting for their turn to appear
-        self.wizards = []
-        self.archers = []
-        self.wizardsAttacks = []  # for fireballs trajectories
-        self.archersAttacks = []  # for bows trajectories
-
-        self.wizardsAttacks = []
-        self.archersAttacks = []
-
-        self.land_tiles = []
-        self.roads = []
-        self.decor = []
-        self.biome = "spring"
-
-        self.fire_counter = 0  # counter of delay for towers fire
-        self.spawn_counter = 0  # counter of delay for units spawn during a wave
-        self.wave_counter = 0  # counter for pause between waves
-        self.move_counter = 0  # counter for unit move delay
-
-        self.fire_delay = 3  # count of iteration between towers' fire
-        self.spawn_delay = 4  # count of iteration between spawns in a wave
-        self.first_wave_delay = 80  # count of iteration before 2 wave
-        self.wave_delay = self.first_wave_delay  # count of iteration before between waves
-        self.wave_menu_delay = 30  # count of iteration before hide wave_menu
-        self.start_delay = 50  # delay before starting of waves
-
-        self.setFocusPolicy(QtCore.Qt.FocusPolicy.StrongFocus)
-
-        self.castleHP = 1000
-        self.castlePosition = [14, 8]
-        self.money_count = 1000
-        self.last_square = [[]]
-        self.game_over = False  # castle HP==0, end of game
-
-        self.spawn_point = self.road_generation()[0]
-        self.wave_level = 0
-        self.units_in_first_wave = 4
-
-        self.timer = QtCore.QBasicTimer()
-
-        self.board_generation()
-
-    # UNITS AND TOWERS LOGIC
-    def enemy_wave(self):  # create enemies in accordance with wave_level
-        self.wave_level += 1
-        # self.wave_delay += self.first_wave_delay
-        units_count = self.units_in_first_wave * self.wave_level  # units in wave: 4, 8, 12, 16...
-        low_units_level = self.wave_level % self.max_possible_level
-        enemy_levels = np.random.randint(low_units_level,
-                                         high=min(self.wave_level + 1, self.max_possible_level), size=units_count)
-        for i in range(units_count):
-            unit_level = enemy_levels[i]
-            self.enemies_in_reserve.append(unit_level)
-
-    def add_enemy_to_fight(self):
-        self.enemies.append(UFO(copy.deepcopy(self.spawn_point), self.enemies_in_reserve.pop(0)))
-
-    @staticmethod
-    def in_range(target, tower) -> bool:  # return true if a particular unit in the tower's range
-        dx = tower.position[0] - target.position[0]
-        dy = tower.position[1] - target.position[1]
-        distance = sqrt(dx ** 2 + dy ** 2)
-        if distance <= tower.range:
-            return True
-        else:
-            return False
-
-    def shelling(self):
-        for a in range(len(self.archers)):
-            for e in range(len(self.enemies)):
-                archer = self.archers[a]
-                enemy = self.enemies[e]
-                if self.in_range(enemy, archer):
-                    self.enemies[e].take_damage(self.archers[a].make_damage())
-                    self.archersAttacks.append((enemy.position, archer.position))
-                    break
-
-        for w in range(len(self.wizards)):
-            for e in range(len(self.enemies)):
-                wizard = self.wizards[w]
-                enemy = self.enemies[e]
-                if self.in_range(enemy, wizard):
-                    self.wizardsAttacks.append((enemy.position, wizard.position))
-                    self.enemies[e].take_damage(self.wizards[w].make_damage())
-
-    def units_move(self):
-        for i in range(len(self.enemies)):
-            if self.move_counter % self.enemies[i].velocity == 0:
-                self.enemies[i].move(self.trajectory(self.enemies[i].position))
-
-    def units_destroy(self):
-        for enemy in self.enemies:
-            if enemy.position == self.castlePosition:
-                self.enemies.remove(enemy)
-
-    def castle_damage(self):
-        for enemy in self.enemies:
-            if enemy.position == self.castlePosition:
-                self.castleHP -= enemy.force
-        if self.castleHP < 0:
-            self.castleHP = 0
-
-    def castle_is_alive(self) -> bool:
-        if self.castleHP <= 0:
-            return False
-        else:
-            return True
-
-    def restart(self):
-        self.enemies = []
-        self.enemies_in_reserve = []  # levels of enemies which were generated by wave
-        # and now are waiting for their turn to appear
-        self.wizards = []
-        self.archers = []
-        self.wizardsAttacks = []  # for fireballs trajectories
-        self.archersAttacks = []  # for bows trajectories
-
-        self.wizardsAttacks = []
-        self.archersAttacks = []
-
-        self.castleHP = 1000
-        self.castlePosition = [14, 8]
-        self.money_count = 1000
-        self.last_square = [[]]
-        self.game_over = False  # castle HP==0, end of game
-
-        self.wave_delay = self.first_wave_delay
-        self.start_delay = 50
-        self.wave_level = 0
-
-        self.start()
-
-    # MONEY
-    def get_money(self):
-        for enemy in self.enemies:
-            if not (enemy.is_alive()):
-                self.money_count += enemy.money_award
-                self.enemies.remove(enemy)
-
-    # TIMER AND MOUSE
-    def start(self):
-        self.timer.start(Board.SPEED, self)
-
-    def timerEvent(self, a0: QtCore.QTimerEvent) -> None:
-        if a0.timerId() == self.timer.timerId():
-            if not (self.castle_is_alive()):
-                self.game_over = True
-                self.update()
-                return
-
-            if self.combo.archer_buy:
-                if self.money_count >= 150:
-                    self.money_count -= 150
-                    self.combo.archer_buy = False
-                    self.archers.append(Archer(self.last_square[0], 1))
-                    self.update()
-                else:
-                    self.combo.archer_buy = False
-                    self.update()
-
-            elif self.combo.wizard_buy:
-                self.money_count -= 200
-                self.combo.wizard_buy = False
-                self.wizards.append(Wizard(self.last_square[0], 1))
-                self.update()
-
-            if self.upgrade.archer_buy:
-                self.money_count -= self.upgrade.archer_cost
-                self.upgrade.archer_buy = False
-                del self.archers[self.archers_coordinates().index(self.last_square[0])]
-                self.archers.append(Archer(self.last_square[0], self.upgrade.level + 1))
-                self.update()
-
-            if self.start_delay != 0:
-                self.start_delay -= 1
-                return
-
-            self.units_move()
-            self.castle_damage()
-            self.units_destroy()
-
-            if self.fire_counter % self.fire_delay == 0:
-                self.shelling()
-
-            if self.fire_counter % self.fire_delay == 1:
-                self.get_money()
-
-            if self.fire_counter % self.fire_delay == 1:
-                self.archersAttacks.clear()
-                self.wizardsAttacks.clear()
-
-            if self.wave_counter % self.wave_delay == 0:
-                self.enemy_wave()
-
-            if len(self.enemies_in_reserve) != 0 and self.spawn_counter % self.spawn_delay == 0:
-                self.add_enemy_to_fight()
-
-            self.fire_counter = self.fire_counter % self.fire_delay + 1
-            self.wave_counter = self.wave_counter % self.wave_delay + 1
-            self.spawn_counter = self.spawn_counter % self.spawn_delay + 1
-            self.move_counter = self.move_counter % (self.max_possible_level + 1) + 1
-            self.update()
-
-    def archers_coordinates(self):
-        answer = []
-        for i in self.archers:
-            answer.append(i.position)
-        return answer
-
-    def mousePressEvent(self, a0: QtGui.QMouseEvent) -> None:
-        if self.game_over:
-            if 0 <= a0.x() <= self.frameGeometry().width() \
-                    and 0 <= a0.y() <= self.frameGeometry().height():
-                self.restart()
-            return
-
-        for coord in self.tower_places:
-            if self.x_coord(coord[1], coord[0]) <= a0.x() <= self.x_coord(coord[1], coord[0]) + self.tile_width() \
-                    and self.y_coord(coord[0]) <= a0.y() <= self.y_coord(coord[0]) + self.tile_height():
-                if coord in self.archers_coordinates():
-                    self.last_square[0] = coord
-                    level = self.archers[self.archers_coordinates().index(self.last_square[0])].level
-                    if (level == 1 and self.money_count < 500) or (level == 2 and self.money_count < 2000) or level == 3:
-                        break
-                    self.upgrade.level = level
-                    self.upgrade.show()
-                else:
-                    self.last_square[0] = coord
-                    self.combo.show()
-
-    # MAP GENERATION
-    def trajectory(self, coord):
-        road = self.road_generation()
-        if coord in road[:-1]:
-            coord = road[road.index(coord) + 1]
-        else:
-            coord[0] += 1
-            coord[1] += 1
-        return coord
-
-    @staticmethod
-    def road_generation():
-        road = [[i, i // 2 - 1] for i in range(2, 10)]
-        road += [[i, 3 - i % 2 - (i - 10) // 2] for i in range(10, 15)]
-        road += [[i, i // 2 - 6] for i in range(15, 19)]
-        road += [[i, 3 + (17 - i) % 2 + (17 - i) // 2] for i in range(17, 10, -1)]
-        road += [[i, i // 2 + 1] for i in range(12, 15)]
-        return road
-
-    def board_generation(self):
-        road_traj = self.road_generation()
-        tower_places = [[6, 1], [7, 3], [17, 1], [13, 4], [11, 7]]
-        environments = [[5, 5], [14, 6], [10, 1], [1, 2], [18, 4], [19, 1], [2, 7]]
-        for i in range(0, 3 * self.HEIGHTINBLOCKS + 3, 1):
-            for j in range(0, self.WIDTHINBLOCKS + 1, 1):
-                if [i, j] in tower_places:
-                    self.land_tiles.append(Landscape(np.array([i, j]), self.biome, tower_place=True))
-                elif [i, j] in road_traj:
-                    if [i, j] == [9, 3]:
-                        self.land_tiles.append(Road(np.array([i, j]), self.biome, "left_twist"))
-                    elif [i, j] == [14, 1]:
-                        self.land_tiles.append(Road(np.array([i, j]), self.biome, "right_twist"))
-                    elif [i, j] == [18, 3]:
-                        self.land_tiles.append(Road(np.array([i, j]), self.biome, "top_twist"))
-                    elif [i, j] == [11, 6]:
-                        self.land_tiles.append(Road(np.array([i, j]), self.biome, "bottom_twist"))
-                    else:
-                        if road_traj.index([9, 3]) < road_traj.index([i, j]) < road_traj.index([14, 1]):
-                            self.land_tiles.append(Road(np.array([i, j]), self.biome, "left"))
-                        elif road_traj.index([18, 3]) < road_traj.index([i, j]) < road_traj.index([11, 6]):
-                            self.land_tiles.append(Road(np.array([i, j]), self.biome, "left"))
-                        else:
-                            self.land_tiles.append(Road(np.array([i, j]), self.biome, "right"))
-                else:
-                    self.land_tiles.append(Landscape(np.array([i, j]), self.biome, tower_place=False))
-                if [i, j] in environments:
-                    if [i, j] in environments[:3]:
-                        self.decor.append(EnvironmentalTiles(np.array([i, j]), self.biome, "plant2"))
-                    elif [i, j] in environments[3:6]:
-                        self.decor.append(EnvironmentalTiles(np.array([i, j]), self.biome, "plant1"))
-                    else:
-                        self.decor.append(EnvironmentalTiles(np.array([i, j]), self.biome, "decoration1"))
-
-    def tile_width(self):
-        return self.frameGeometry().width() / self.WIDTHINBLOCKS
-
-    def tile_height(self):
-        return self.frameGeometry().height() / self.HEIGHTINBLOCKS
-
-    def y_coord(self, y_line):
-        height = self.tile_height()
-        if y_line == 0:
-            return -height / 2 - self.tile_height() / 5.5 * y_line
-        else:
-            return height / 2 * (y_line - 1) - self.tile_height() / 5.5 * y_line
-
-    def x_coord(self, x_line, y_line):
-        width = self.tile_width()
-        if y_line % 2 == 0:
-            return -width / 2 + width * x_line
-        else:
-            return width * x_line
-
-    # PAINTING OF MAP
-    def draw_rect(self, painter, x, y, image, width=None, height=None):
-        if width is None:
-            width = self.tile_width()
-        if height is None:
-            height = self.tile_height()
-        rect = QtCore.QRect(int(x), int(y), int(width), int(height))
-        painter.drawImage(rect, image)
-
-    def paintEvent(self, a0: QtGui.QPaintEvent) -> None:
-        painter = QtGui.QPainter(self)
-        rect = self.contentsRect()
-        board_top = rect.bottom() - self.frameGeometry().height()
-
-        if self.game_over:
-            self.draw_end_menu(painter)
-            return
-
-        self.paint_land(painter, rect, board_top)
-        self.paint_decoration(painter, rect, board_top)
-
-        self.paint_towers(painter, rect, board_top)
-        if self.fire_counter % self.fire_delay == 1:  # if it's fire iteration
-            self.paint_shoots(painter)
-        self.paint_units(painter, rect, board_top)
-
-        if self.wave_menu_delay >= self.wave_counter % self.wave_delay > 0 == self.start_delay:
-            self.draw_wave_menu(painter)
-        self.draw_menu(painter)
-
-    def paint_land(self, painter, rect, board_top):
-        for land in self.land_tiles:
-            i = land.position[0]
-            j = land.position[1]
-            y = self.y_coord(i)
-            x = self.x_coord(j, i)
-            self.draw_rect(painter, rect.left() + x, board_top + y, land.skin)
-
-    def paint_decoration(self, painter, rect, board_top):
-        for decoration in self.decor:
-            i = decoration.position[0]
-            j = decoration.position[1]
-            y = self.y_coord(i)
-            x = self.x_coord(j, i)
-            self.draw_rect(painter, rect.left() + x + self.tile_width() / 5.5, board_top + y + self.tile_height() / 2.5,
-                           decoration.skin, self.tile_width() / 1.5, self.tile_height() / 1.5)
-
-    def paint_towers(self, painter, rect, board_top):
-        for archer in self.archers:
-            coord = archer.position
-            i = coord[0]
-            j = coord[1]
-            y = self.y_coord(i)
-            x = self.x_coord(j, i)
-            x_shift = self.tile_width() / 9
-            y_shift = self.tile_height() / 5
-            width_compression = 1.3
-            height_compression = 1.3
-            self.draw_rect(painter, rect.left() + x + x_shift, board_top + y - y_shift, archer.skin,
-                           width=self.tile_width() / width_compression,
-                           height=self.tile_height() / height_compression)
-
-        for wizard in self.wizards:
-            coord = wizard.position
-            i = coord[0]
-            j = coord[1]
-            y = self.y_coord(i)
-            x = self.x_coord(j, i)
-            self.draw_rect(painter, rect.left() + x, board_top + y, wizard.skin)
-
-    def paint_shoots(self, painter):
-        for enemy, archer in self.archersAttacks:
-            x1 = self.x_coord(archer[1], archer[0]) + self.tile_width() / 2
-            y1 = self.y_coord(archer[0]) + self.tile_height() / 4
-            x2 = self.x_coord(enemy[1], enemy[0]) + self.tile_width() / 2
-            y2 = self.y_coord(enemy[0]) + self.tile_height() / 4
-            dy = y1 - y2
-            dx = x1 - x2
-            alpha = math.degrees(math.atan2(dy, dx))
-            if dx > 0:
-                alpha = -alpha
-            if dy < 0:
-                alpha += 180
-            t = QTransform().rotate(alpha)
-            twisted_arrow = QtGui.QImage(self.arrow).transformed(t)
-            painter.drawLine(int(x1), int(y1), int(x2), int(y2))
-            # self.draw_rect(painter, int(x1), int(y1), twisted_arrow,
-            #                width=self.tile_width() / 6, height=self.tile_height() / 3)
-        for enemy, wizard in self.wizardsAttacks:
-            x1 = self.x_coord(wizard[1], wizard[0])
-            y1 = self.y_coord(wizard[0])
-            x2 = self.x_coord(enemy[1], enemy[0])
-            y2 = self.y_coord(enemy[0])
-            painter.drawLine(int(x1), int(y1), int(x2), int(y2))
-
-    def paint_units(self, painter, rect, board_top):
-        for enemy in self.enemies:
-            coord = enemy.position
-            i = coord[0]
-            j = coord[1]
-            y = self.y_coord(i)
-            x = self.x_coord(j, i)
-            x_shift = self.tile_width() / 4 + 10
-            y_shift = 10
-            width_compression = 3
-            height_compression = 3
-            self.draw_rect(painter, rect.left() + x + x_shift, board_top + y + y_shift, enemy.skin,
-                           width=self.tile_width() / width_compression,
-                           height=self.tile_height() / height_compression)
-
-    def draw_end_menu(self, painter):
-        self.draw_rect(painter, 0, 0, self.end_menu_background,
-                       width=self.frameGeometry().width(), height=self.frameGeometry().height())
-
-    def draw_wave_menu(self, painter):
-        x_wave = self.frameGeometry().width() / 100 * 65  # x coord of wave block
-        y_wave = self.frameGeometry().height() / 100 * 78  # y coord of wave block
-        self.draw_rect(painter, x_wave, y_wave, self.wave_menu,
-                       width=self.tile_width() * 2.5, height=self.tile_height() * 1.4)
-        self.draw_rect(painter, x_wave * 1.09, y_wave * 1.09, self.alien,
-                       width=self.tile_width() / 3, height=self.tile_height() / 2)
-
-        font = painter.font()
-        font.setPixelSize(50)
-        painter.setFont(font)
-
-        painter.drawText(int(x_wave * 1.18), int(y_wave * 1.09), 300, 200, 0, "WAVE " + str(self.wave_level))
-
-    def draw_menu(self, painter):
-        x_menu = self.frameGeometry().width() / 100 * 65  # x coord of menu block
-        y_menu = self.frameGeometry().height() / 100  # y coord of menu block
-
-        self.draw_rect(painter, x_menu, y_menu, self.menu,
-                       width=self.tile_width() * 2.5, height=self.tile_height() * 1.4)
-        self.draw_rect(painter, x_menu * 1.32, y_menu * 8.2, self.heart,
-                       width=self.tile_width() / 3, height=self.tile_height() / 3)
-
-        self.draw_rect(painter, x_menu * 1.16, y_menu * 8, self.coins,
-                       width=self.tile_width() / 4, height=self.tile_height() / 3)
-        self.draw_rect(painter, x_menu * 1.32, y_menu * 8.2, self.heart,
-                       width=self.tile_width() / 3, height=self.tile_height() / 3)
-
-        font = painter.font()
-        font.setPixelSize(25)
-        painter.setFont(font)
-
-        painter.drawText(int(x_menu * 1.08), int(y_menu * 9), 100, 200, 0, str(self.money_count))
-        painter.drawText(int(x_menu * 1.24), int(y_menu * 9), 100, 200, 0, str(self.castleHP))
-
-
-class Unit:
-    def __init__(self, coord, level, skins, direction):
-        self.position = coord
-        self.level = level
-        self.HP = 30 * level
-        self.skin = skins[level - 1]
-        max_possible_level = 7
-        self.velocity = level + 2  # 1 square in 3, 4, 5, 6... iteration
-        self.force = 10 * level  # 10, 20, 30... damage (for units and castle)
-
-    def move(self, coord):
-        self.position = coord
-
-    def take_damage(self, value):
-        self.HP -= value
-        if self.HP <= 0:
-            self.HP = 0
-
-    def is_alive(self) -> bool:
-        if self.HP == 0:
-            return False
-        else:
-            return True
-
-    def make_damage(self) -> int:
-        return self.force
-
-
-class Warrior(Unit):
-    def __init__(self, coord, level):
-        skins = [QtGui.QImage("Sprites/Towers/Barrack/warrior_level_1.png"),
-                 QtGui.QImage("Sprites/Towers/Barrack/warrior_level_2.png"),
-                 QtGui.QImage("Sprites/Towers/Barrack/warrior_level_3.png")]
-        super().__init__(coord, level, skins, "inverse")
-
-
-class UFO(Unit):
-    def __init__(self, coord, level):
-        skins = [QtGui.QImage("Sprites/UFO/UFO(1).png"),
-                 QtGui.QImage("Sprites/UFO/UFO(2).png"),
-                 QtGui.QImage("Sprites/UFO/UFO(3).png"),
-                 QtGui.QImage("Sprites/UFO/UFO(4).png"),
-                 QtGui.QImage("Sprites/UFO/UFO(5).png"),
-                 QtGui.QImage("Sprites/UFO/UFO(6).png"),
-                 QtGui.QImage("Sprites/UFO/UFO(7).png")]
-        self.money_award = 20 * level
-        super().__init__(coord, level, skins, "direct")
-
-
-class Tower:
-    def __init__(self, coord, level, skins):  # skins is array of QImage
-        self.position = coord
-        self.level = level
-        self.skins = skins
-        self.skin = skins[level - 1]
-        self.range = 4 * level  # 10, 20, 30 squares
-        self.force = 20 * level  # 20, 40, 60 damage
-        self.upgrade_cost = level * 50  # 50, 100, 150 coins
-        self.building_cost = level * 100  # 100, 200, 300 coins
-
-    def change_picture(self):  # change picture in order to level
-        self.skin = self.skins[self.level]
-
-    def level_up(self):
-        self.level += 1
-        self.range = 10 * self.level  # 10, 20, 30 pixels
-        self.force = 10 * self.level  # 20, 40, 60 damage
-        self.upgrade_cost = self.level * 50  # 50, 100, 150 coins
-        self.change_picture()
-
-    def make_damage(self) -> int:
-        return self.force
-
-    def upgrade_cost(self) -> int:  # return upgrade cost
-        return self.upgrade_cost
-
-
-class Archer(Tower):
-    def __init__(self, coord, level):
-        skins = [QtGui.QImage("Sprites/Towers/Archer/archer_level_1.png"),
-                 QtGui.QImage("Sprites/Towers/Archer/archer_level_2.png"),
-                 QtGui.QImage("Sprites/Towers/Archer/archer_level_3.png")]
-
-        super().__init__(coord, level, skins)
-
-
-class Wizard(Tower):
-    def __init__(self, coord, level):
-        skins = [QtGui.QImage("Sprites/Towers/Barrack/wizard_level_1.png"),
-                 QtGui.QImage("Sprites/Towers/Barrack/wizard_level_2.png"),
-                 QtGui.QImage("Sprites/Towers/Barrack/wizard_level_3.png")]
-        super().__init__(coord, level, skins)
-
-
-class Tile:
-    def __init__(self, coord, skin):
-        self.position = coord
-        self.skin = skin
-
-
-class Road(Tile):
-    def __init__(self, coord, biome, tile_type):  # np.array(x, y) coord, str biome : {"spring", "winter", "desert"},
-        # str tile_type : {"left", "right", "right_top_crossroad",
-        # "right_bottom_crossroad", "left_top_crossroad",
-        # "left_bottom_crossroad",  "bottom_twist", "top_twist",
-        # "right_twist", "left_twist"}
-        biome = biome.title()
-        skin = QtGui.QImage("Sprites/Road tiles/" + biome + "/" + tile_type + ".png")
-
-        super().__init__(coord, skin)
-        self.type = tile_type  # maybe will be needed
-
-
-class Landscape(Tile):
-    def __init__(self, coord, biome, tower_place=False):  # np.array(x, y) coord,
-        # str biome = {"spring", "winter", "desert"}, bool tower_place
-        desert_biome = [QtGui.QImage("Sprites/Landscape tiles/sand.png"),
-                        QtGui.QImage("Sprites/Landscape tiles/buildingPlaceSand.png")]
-        spring_biome = [QtGui.QImage("Sprites/Landscape tiles/grass.png"),
-                        QtGui.QImage("Sprites/Landscape tiles/buildingPlaceGrass.png")]
-        winter_biome = [QtGui.QImage("Sprites/Landscape tiles/snow.png"),
-                        QtGui.QImage("Sprites/Landscape tiles/buildingPlaceSnow.png")]
-
-        skin = QtGui.QImage()
-
-        if biome == "desert":
-            if tower_place:
-                skin = desert_biome[1]
-            else:
-                skin = desert_biome[0]
-        elif biome == "spring":
-            if tower_place:
-                skin = spring_biome[1]
-            else:
-                skin = spring_biome[0]
-        elif biome == "winter":
-            if tower_place:
-                skin = winter_biome[1]
-            else:
-                skin = winter_biome[0]
-
-        super().__init__(coord, skin)
-        self.tower_place = tower_place
-
-
-class EnvironmentalTiles(Tile):
-    def __init__(self, coord, biome, tile_type):  # np.array(x, y) coord, str biome = {"spring", "winter", "desert"},
-
-        winter_biome = [QtGui.QImage("Sprites/Enviroument tiles/winter/circle_tree.png"),
-                        QtGui.QImage("Sprites/Enviroument tiles/winter/normal_tree.png"),
-                        QtGui.QImage("Sprites/Enviroument tiles/winter/snowdrift1.png"),
-                        QtGui.QImage("Sprites/Enviroument tiles/winter/snowdrift2.png")]
-
-        spring_biome = [QtGui.QImage("Sprites/Enviroument tiles/spring/circle_tree.png"),
-                        QtGui.QImage("Sprites/Enviroument tiles/spring/normal_tree.png"),
-                        QtGui.QImage("Sprites/Enviroument tiles/spring/gray_stone.png"),
-                        QtGui.QImage("Sprites/Enviroument tiles/spring/gray_big_stone.png")]
-
-        desert_biome = [QtGui.QImage("Sprites/Enviroument tiles/desert/cactus1.png"),
-                        QtGui.QImage("Sprites/Enviroument tiles/desert/cactus2.png"),
-                        QtGui.QImage("Sprites/Enviroument tiles/desert/sandstone.png"),
-                        QtGui.QImage("Sprites/Enviroument tiles/desert/big_sandstone.png")]
-
-        skin = QtGui.QImage()
-
-        if biome == "desert":
-            if tile_type == "plant1":
-                skin = desert_biome[0]
-            elif tile_type == "plant2":
-                skin = desert_biome[1]
-            elif tile_type == "decoration1":
-                skin = desert_biome[2]
-            else:
-                skin = desert_biome[3]
-
-        elif biome == "spring":
-            if tile_type == "plant1":
-                skin = spring_biome[0]
-            elif tile_type == "plant":
-                skin = spring_biome[1]
-            elif tile_type == "decoration1":
-                skin = spring_biome[2]
-            else:
-                skin = spring_biome[3]
-
-        elif biome == "winter":
-            if tile_type == "plant1":
-                skin = winter_biome[0]
-            elif tile_type == "plant2":
-                skin = winter_biome[1]
-            elif tile_type == "decoration1":
-                skin = winter_biome[2]
-            else:
-                skin = winter_biome[3]
-
-        super().__init__(coord, skin)
-
-
-class BuyMenu(QLabel):
-    def __init__(self):
-        super().__init__()
-
-        self.setWindowTitle("Buy menu")
-        self.setFixedSize(250, 200)
-        self.archer_cost = 150
-        self.wizard_cost = 200
-        self.archer_buy = False
-        self.wizard_buy = False
-
-        style = """
-            QLabel {
-                color: gold;
-                background-color: grey;
-                font-family: Arial;
-                font-style: bold;
-            }
-        """
-
-        self.setStyleSheet(style)
-
-    def paintEvent(self, a0: QtGui.QPaintEvent) -> None:
-        painter = QtGui.QPainter(self)
-        archer_rect = QtCore.QRect(int(10), int(10), int(100), int(100))
-        wizard_rect = QtCore.QRect(int(150), int(10), int(100), int(100))
-
-        painter.drawImage(archer_rect, QtGui.QImage("Sprites/Towers/Archer/archer_level_1.png"))
-        painter.drawImage(wizard_rect, QtGui.QImage("Sprites/Towers/Wizard/wizard_level_1.png"))
-
-        font = painter.font()
-        font.setPixelSize(25)
-        painter.setFont(font)
-
-        painter.drawText(35, 130, 100, 100, 0, str(self.archer_cost))
-        painter.drawText(175, 130, 100, 200, 0, str(self.wizard_cost))
-
-    def mousePressEvent(self, a0: QtGui.QMouseEvent) -> None:
-        if 10 <= a0.x() <= 110 and 10 <= a0.y() <= 110:
-            self.archer_buy = True
-            self.close()
-
-        elif 150 <= a0.x() <= 250 and 10 <= a0.y() <= 110:
-            self.wizard_buy = True
-            self.close()
-
-
-class UpgradeMenu(QLabel):
-    def __init__(self):
-        super().__init__()
-
-        self.setWindowTitle("Upgrade menu")
-        self.setFixedSize(250, 200)
-        self.archer_cost = 500
-        self.archer_buy = False
-        self.level = 1
-
-        style = """
-            QLabel {
-                color: gold;
-                background-color: grey;
-                font-family: Arial;
-                font-style: bold;
-            }
-        """
-
-        self.setStyleSheet(style)
-
-    def paintEvent(self, a0: QtGui.QPaintEvent) -> None:
-        painter = QtGui.QPainter(self)
-        archer_rect = QtCore.QRect(int(70), int(10), int(100), int(100))
-
-        if self.level == 1:
-            painter.drawImage(archer_rect, QtGui.QImage("Sprites/Towers/Archer/archer_level_2.png"))
-        elif self.level == 2:
-            self.archer_cost = 2000
-            painter.drawImage(archer_rect, QtGui.QImage("Sprites/Towers/Archer/archer_level_3.png"))
-
-        font = painter.font()
-        font.setPixelSize(25)
-        painter.setFont(font)
-
-        painter.drawText(100, 130, 100, 100, 0, str(self.archer_cost))
-
-    def mousePressEvent(self, a0: QtGui.QMouseEvent) -> None:
-        if 70 <= a0.x() <= 170 and 10 <= a0.y() <= 110:
-            self.archer_buy = True
-            self.close()
-
-
-class MainWindow(QtWidgets.QMainWindow):
-    def __init__(self):
-        super(MainWindow, self).__init__()
-
-        self.board = Board(self)
-        self.setCentralWidget(self.board)
-        self.setGeometry(100, 50, 1500, 950)
-        self.setWindowTitle("Ultra tower defence")
-        self.board.start()
-        self.show()
-
-
-if __name__ == "__main__":
-    import sys
-
-    app = QtWidgets.QApplication(sys.argv)
-    MainWindow = MainWindow()
-    MainWindow.show()
-    sys.exit(app.exec_())
+import gc
+import glob
+import time
+from collections import OrderedDict
+
+LAUNCH_TIME = time.perf_counter()  # start of the import of the game, for the first frame report
+
+import numpy as np
+import os
+import sys
+from PyQt5 import QtGui, QtCore, QtWidgets
+from PyQt5.Qt import QTransform
+from PyQt5.QtWidgets import QApplication, QMainWindow, QPushButton, QLabel, QVBoxLayout, QWidget
+
+import atlas
+import maps
+from assets import sprites
+from profiler import Profiler
+from projectiles import ARROW
+from simulation import Simulation
+from snapshot import save_snapshot, load_snapshot
+
+
+class Board(QtWidgets.QFrame):
+    SPEED = 100  # ms of game time in one simulation tick
+    FRAME_INTERVAL = 16  # ms between rendered frames
+    MAX_TICKS_PER_FRAME = 10  # catch-up limit, a longer stall slows the game instead of freezing it
+    SPEEDS = (1, 2, 8, None)  # fast-forward factors cycled by F, None ticks as fast as possible
+    MAX_SPEED_TIME = 12  # ms of each frame spent on ticks at the max speed
+    MAX_SPEED_BATCH = 16  # ticks between looks at the clock at the max speed
+    MAX_DIRTY_RECTS = 128  # above that a frame repaints the bounding rect of the changes
+    ROTATION_STEPS = 64  # directions of the pre-rotated projectile sprites
+
+    CHUNK_SIZE = 512  # px of the cached pieces of the terrain
+    MAX_CHUNKS = 64  # chunk pixmaps kept, the least recently drawn ones are dropped
+    MIN_ZOOM = 0.25
+    MAX_ZOOM = 4
+    ZOOM_STEP = 1.25
+    PAN_STEP = 100  # px the view moves on an arrow key
+
+    WIDTHINBLOCKS = 8  # squares across the board at zoom 1
+    HEIGHTINBLOCKS = 7
+    max_possible_level = 7  # max possible level of enemies
+
+    # attribute -> sprite, decoded in the background while the loading screen is shown
+    SPRITES = {"coins": "Sprites/coins.png",
+               "menu": "Sprites/menu.png",
+               "heart": "Sprites/heart.png",
+               "wave_menu": "Sprites/wave_level.png",
+               "alien": "Sprites/alien.png",
+               "arrow": "Sprites/Towers/Archer/arrow.png",
+               "fireball": "Sprites/Towers/Wizard/wizard_bullet.png",
+               "end_menu_background": "Sprites/endgame_background.png"}
+    UFO_SKINS = ["Sprites/UFO/UFO(%d).png" % level for level in range(1, 8)]
+    ARCHER_SKINS = ["Sprites/Towers/Archer/archer_level_%d.png" % level for level in range(1, 4)]
+    WIZARD_SKINS = ["Sprites/Towers/Barrack/wizard_level_%d.png" % level for level in range(1, 4)]
+
+    def __init__(self, parent, seed=None, **params):  # params go to Simulation, e.g. map_path
+        super(Board, self).__init__(parent)
+        self.player = None  # soundtrack player, created after the first frame
+        self.first_frame_time = None  # seconds from LAUNCH_TIME to the first painted frame
+
+        self.simulation = Simulation(seed, **params)
+
+        self.combo = BuyMenu()
+        self.combo.archer_cost = self.simulation.archer_cost
+        self.combo.wizard_cost = self.simulation.wizard_cost
+        self.upgrade = UpgradeMenu()
+
+        self.land_tiles = []  # rows of tiles of the map
+        self.roads = []
+        self.decor = {}  # row -> decorations in it
+        self.biome = self.simulation.map.biome
+        self.chunks = OrderedDict()  # (column, row) of a CHUNK_SIZE square of the board -> pre-rendered terrain
+        self.chunks_key = None  # (tile width, tile height, biome) the chunks were rendered for
+        self.camera_x = 0  # board pixel at the top left corner of the widget
+        self.camera_y = 0
+        self.zoom = 1.0
+        self.drag_position = None  # last mouse position while the view is dragged with the right button
+        self.scaled_sprites = {}  # (image cache key, width, height) -> pixmap pre-scaled to that size
+        self.rotated_sprites = {}  # (image cache key, width, height) -> pixmaps in ROTATION_STEPS directions
+        self.batch_sprites = {}  # (image cache key, width, height) -> (image, width, height) drawn in batches
+        self.batch_rects = {}  # same key -> (page, source rect) of the pre-scaled sprite in batch_pages
+        self.batch_pages = []  # pixmaps with the batch_sprites packed by atlas.pack
+
+        self.wave_menu_delay = 30  # count of iteration before hide wave_menu
+
+        self.setFocusPolicy(QtCore.Qt.FocusPolicy.StrongFocus)
+
+        self.last_square = [[]]
+        self.quicksave_path = "quicksave.tdsnap"  # F5 saves the game there, F9 loads it
+
+        self.timer = QtCore.QBasicTimer()
+        self.clock = QtCore.QElapsedTimer()
+        self.lag = 0  # ms of game time not yet simulated
+        self.interpolation = 0.0  # part of the next tick already elapsed, for drawing moving units
+        self.speed = 1  # one of SPEEDS
+        self.rate_clock = QtCore.QElapsedTimer()
+        self.rate_ticks = 0  # ticks since rate_clock started
+        self.tick_rate = 0.0  # achieved ticks per second, shown while fast-forwarding
+        self.painted_scene = set()  # scene() as of the last requested repaint
+
+        self.profiler = None  # Profiler drawn as an overlay, toggled by F3
+        self.profile_csv = None  # file the profiler streams per tick timings to
+
+        if os.path.exists(atlas.INDEX_PATH):  # built by atlas.py, decoded as a few pages instead of every file
+            sprites.use_atlas(atlas.INDEX_PATH)
+        self.loading = sprites.preload(self.sprite_paths())  # assets.Preload until the sprites are decoded
+        self.loading_started = time.perf_counter()
+
+    # LOADING
+    def sprite_paths(self):
+        paths = list(Board.SPRITES.values()) + Board.UFO_SKINS + Board.ARCHER_SKINS + Board.WIZARD_SKINS
+        paths += glob.glob("Sprites/Landscape tiles/*.png")
+        paths += glob.glob("Sprites/Road tiles/" + self.biome.title() + "/*.png")
+        paths += glob.glob("Sprites/Enviroument tiles/" + self.biome + "/*.png")
+        return paths
+
+    def finish_loading(self):  # blocks until every sprite is decoded, then builds the board
+        self.loading.wait()
+        for name, path in Board.SPRITES.items():
+            setattr(self, name, sprites.image(path))
+        self.ufo_skins = [sprites.image(path) for path in Board.UFO_SKINS]
+        self.archer_skins = [sprites.image(path) for path in Board.ARCHER_SKINS]
+        self.wizard_skins = [sprites.image(path) for path in Board.WIZARD_SKINS]
+        self.board_generation()
+        self.loading = None
+        gc.collect()
+        gc.freeze()  # the tiles, sprites and caches built so far live until exit, later collections skip them
+        stats = sprites.stats()
+        print("sprites loaded in %.3f s: %d files, %.3f s of decoding over all threads, %d cache hits, %d images, "
+              "%.1f MB" % (time.perf_counter() - self.loading_started, stats["loads"], stats["load_time"],
+                           stats["hits"], stats["cached"], stats["bytes"] / 2 ** 20))
+        self.start()
+        self.full_update()
+
+    def start_music(self):  # QtMultimedia takes long to import, so the soundtrack starts after the first frame
+        from PyQt5 import QtMultimedia
+
+        self.player = QtMultimedia.QMediaPlayer()
+        url = QtCore.QUrl.fromLocalFile("soundtrack.mp3")
+        content = QtMultimedia.QMediaContent(url)
+        self.player.setMedia(content)
+        self.player.play()
+
+    def draw_loading(self, painter):
+        rect = self.rect()
+        painter.fillRect(rect, QtGui.QColor(40, 40, 40))
+        bar = QtCore.QRect(rect.width() // 4, rect.height() // 2 - 15, rect.width() // 2, 30)
+        painter.setPen(QtGui.QColor("white"))
+        painter.drawRect(bar)
+        progress = self.loading.progress()
+        painter.fillRect(bar.adjusted(2, 2, int(-(bar.width() - 4) * (1 - progress)) - 2, -2), QtGui.QColor("white"))
+        font = painter.font()
+        font.setPixelSize(25)
+        painter.setFont(font)
+        painter.drawText(bar.translated(0, -40), QtCore.Qt.AlignmentFlag.AlignCenter,
+                         "Loading %d%%" % int(progress * 100))
+
+    # TIMER AND MOUSE
+    def start(self):
+        self.timer.start(Board.FRAME_INTERVAL, QtCore.Qt.TimerType.PreciseTimer, self)
+        self.clock.start()
+        self.lag = 0
+        self.rate_clock.start()
+        self.rate_ticks = 0
+
+    def restart(self):
+        self.simulation.restart()
+        self.start()
+        self.full_update()
+
+    def timerEvent(self, a0: QtCore.QTimerEvent) -> None:
+        # the simulation advances in fixed SPEED steps by the real time elapsed, whatever the
+        # frame rate is; when painting falls behind several ticks run before the next frame
+        if a0.timerId() == self.timer.timerId():
+            if self.loading is not None:
+                if self.loading.done():
+                    self.finish_loading()
+                else:
+                    self.update_dirty()
+                return
+            tick_count = self.simulation.tick_count
+            if self.speed is None:
+                self.run_max_speed()
+            else:
+                self.lag += self.clock.restart() * self.speed
+                ticks = 0
+                while self.lag >= Board.SPEED and ticks < Board.MAX_TICKS_PER_FRAME * self.speed:
+                    if self.simulation.castle_is_alive():
+                        self.handle_purchases()
+                    self.simulation.tick()
+                    self.lag -= Board.SPEED
+                    ticks += 1
+                if ticks == Board.MAX_TICKS_PER_FRAME * self.speed:
+                    self.lag = min(self.lag, Board.SPEED)
+                self.interpolation = self.lag / Board.SPEED
+            self.count_ticks(self.simulation.tick_count - tick_count)
+            self.update_dirty()
+
+    def run_max_speed(self):  # tick for MAX_SPEED_TIME ms, only the last state gets painted
+        if self.simulation.castle_is_alive():
+            self.handle_purchases()
+        budget = QtCore.QElapsedTimer()
+        budget.start()
+        while budget.elapsed() < Board.MAX_SPEED_TIME and not self.simulation.game_over:
+            self.simulation.step(Board.MAX_SPEED_BATCH)  # also jumps over idle stretches
+        self.clock.restart()
+        self.lag = 0
+        self.interpolation = 0.0
+
+    def count_ticks(self, ticks):
+        self.rate_ticks += ticks
+        if self.rate_clock.elapsed() >= 500:
+            self.tick_rate = self.rate_ticks * 1000 / self.rate_clock.restart()
+            self.rate_ticks = 0
+
+    def cycle_speed(self):
+        self.speed = Board.SPEEDS[(Board.SPEEDS.index(self.speed) + 1) % len(Board.SPEEDS)]
+        self.clock.restart()
+        self.lag = 0
+        self.rate_clock.restart()
+        self.rate_ticks = 0
+
+    def save_game(self, path):
+        save_snapshot(self.simulation, path)
+
+    def load_game(self, path) -> bool:
+        if self.simulation.recorder is not None:  # an input log replays from a fresh game, not from a snapshot
+            print("cannot load %s while recording an input log" % path)
+            return False
+        if self.profiler is not None:
+            self.profiler.detach(self.simulation)
+        game_map = self.simulation.map
+        self.simulation = load_snapshot(path)
+        if self.profiler is not None:
+            self.profiler.attach_simulation(self.simulation)
+        if self.simulation.map is not game_map:
+            self.set_biome(self.simulation.map.biome)
+        self.full_update()
+        return True
+
+    def toggle_profiler(self):
+        if self.profiler is None:
+            self.profiler = Profiler(csv_path=self.profile_csv)
+            self.profiler.attach_simulation(self.simulation)
+            self.profiler.attach_board(self)
+            self.full_update()
+        else:
+            self.stop_profiler()
+
+    def stop_profiler(self):
+        if self.profiler is not None:
+            self.profiler.close()
+            self.profiler = None
+            self.full_update()
+
+    def keyPressEvent(self, a0: QtGui.QKeyEvent) -> None:
+        if a0.key() == QtCore.Qt.Key.Key_F5:
+            self.save_game(self.quicksave_path)
+        elif a0.key() == QtCore.Qt.Key.Key_F9 and os.path.exists(self.quicksave_path):
+            self.load_game(self.quicksave_path)
+        elif a0.key() == QtCore.Qt.Key.Key_F3:
+            self.toggle_profiler()
+        elif a0.key() == QtCore.Qt.Key.Key_F:
+            self.cycle_speed()
+        elif a0.key() == QtCore.Qt.Key.Key_Left:
+            self.set_camera(self.camera_x - Board.PAN_STEP, self.camera_y)
+        elif a0.key() == QtCore.Qt.Key.Key_Right:
+            self.set_camera(self.camera_x + Board.PAN_STEP, self.camera_y)
+        elif a0.key() == QtCore.Qt.Key.Key_Up:
+            self.set_camera(self.camera_x, self.camera_y - Board.PAN_STEP)
+        elif a0.key() == QtCore.Qt.Key.Key_Down:
+            self.set_camera(self.camera_x, self.camera_y + Board.PAN_STEP)
+        elif a0.key() in (QtCore.Qt.Key.Key_Plus, QtCore.Qt.Key.Key_Equal):
+            self.set_zoom(self.zoom * Board.ZOOM_STEP)
+        elif a0.key() == QtCore.Qt.Key.Key_Minus:
+            self.set_zoom(self.zoom / Board.ZOOM_STEP)
+        elif a0.key() == QtCore.Qt.Key.Key_Home:
+            self.set_zoom(1.0)
+            self.set_camera(0, 0)
+        else:
+            super().keyPressEvent(a0)
+
+    def wheelEvent(self, a0: QtGui.QWheelEvent) -> None:
+        if a0.angleDelta().y() != 0:
+            self.set_zoom(self.zoom * Board.ZOOM_STEP ** (a0.angleDelta().y() / 120), a0.pos())
+
+    def mouseMoveEvent(self, a0: QtGui.QMouseEvent) -> None:
+        if self.drag_position is not None:
+            delta = a0.pos() - self.drag_position
+            self.drag_position = a0.pos()
+            self.set_camera(self.camera_x - delta.x(), self.camera_y - delta.y())
+
+    def mouseReleaseEvent(self, a0: QtGui.QMouseEvent) -> None:
+        if a0.button() == QtCore.Qt.MouseButton.RightButton:
+            self.drag_position = None
+
+    # CAMERA
+    def map_bounds(self):  # left, top, right and bottom board pixels of the map at the current zoom
+        game_map = self.simulation.map
+        return (-self.tile_width() / 2, self.world_y(0),
+                self.tile_width() * game_map.columns, self.world_y(game_map.rows - 1) + self.tile_height())
+
+    def set_camera(self, x, y):  # the centre of the view is kept over the map
+        left, top, right, bottom = self.map_bounds()
+        x = int(min(max(x, left - self.width() / 2), right - self.width() / 2))
+        y = int(min(max(y, top - self.height() / 2), bottom - self.height() / 2))
+        if (x, y) != (self.camera_x, self.camera_y):
+            self.camera_x = x
+            self.camera_y = y
+            self.full_update()
+
+    def set_zoom(self, zoom, anchor=None):  # anchor is the widget point which stays over the same place
+        zoom = min(max(zoom, Board.MIN_ZOOM), Board.MAX_ZOOM)
+        if zoom == self.zoom:
+            return
+        if anchor is None:
+            anchor = QtCore.QPoint(self.width() // 2, self.height() // 2)
+        scale = zoom / self.zoom
+        self.zoom = zoom
+        self.invalidate_background()
+        self.invalidate_sprites()
+        self.set_camera((self.camera_x + anchor.x()) * scale - anchor.x(),
+                        (self.camera_y + anchor.y()) * scale - anchor.y())
+        self.full_update()
+
+    def in_view(self, x, y, width, height) -> bool:  # whether a rect in widget pixels can be seen
+        return x + width >= 0 and y + height >= 0 and x <= self.width() and y <= self.height()
+
+    def handle_purchases(self):
+        if self.combo.archer_buy:
+            self.combo.archer_buy = False
+            self.simulation.buy_archer(self.last_square[0])
+
+        elif self.combo.wizard_buy:
+            self.combo.wizard_buy = False
+            self.simulation.buy_wizard(self.last_square[0])
+
+        if self.upgrade.archer_buy:
+            self.upgrade.archer_buy = False
+            self.simulation.upgrade_archer(self.last_square[0])
+
+    def mousePressEvent(self, a0: QtGui.QMouseEvent) -> None:
+        if a0.button() == QtCore.Qt.MouseButton.RightButton:
+            self.drag_position = a0.pos()
+            return
+        if self.loading is not None:
+            return
+        sim = self.simulation
+        if sim.game_over:
+            if 0 <= a0.x() <= self.frameGeometry().width() \
+                    and 0 <= a0.y() <= self.frameGeometry().height():
+                self.restart()
+            return
+
+        for coord in sim.tower_places:
+            if self.x_coord(coord[1], coord[0]) <= a0.x() <= self.x_coord(coord[1], coord[0]) + self.tile_width() \
+                    and self.y_coord(coord[0]) <= a0.y() <= self.y_coord(coord[0]) + self.tile_height():
+                if coord in sim.archers_coordinates():
+                    self.last_square[0] = coord
+                    if not sim.can_upgrade_archer(coord):
+                        break
+                    level = sim.archers[sim.archers_coordinates().index(coord)].level
+                    self.upgrade.level = level
+                    self.upgrade.archer_cost = sim.archer_upgrade_cost(level)
+                    self.upgrade.show()
+                else:
+                    self.last_square[0] = coord
+                    self.combo.show()
+
+    # MAP GENERATION
+    def board_generation(self):
+        game_map = self.simulation.map
+        self.land_tiles = []
+        for i, row in enumerate(game_map.terrain):
+            tiles = []
+            for j, kind in enumerate(row):
+                if kind == maps.TOWER_PLACE:
+                    tiles.append(Landscape((i, j), self.biome, tower_place=True))
+                elif kind in maps.ROAD_TILES:
+                    tiles.append(Road((i, j), self.biome, maps.ROAD_TILES[kind]))
+                else:
+                    tiles.append(Landscape((i, j), self.biome, tower_place=False))
+            self.land_tiles.append(tiles)
+        self.decor = {}
+        for i, j, kind in game_map.decor:
+            self.decor.setdefault(i, []).append(EnvironmentalTiles((i, j), self.biome, kind))
+
+    def tile_width(self):
+        return self.frameGeometry().width() / self.WIDTHINBLOCKS * self.zoom
+
+    def tile_height(self):
+        return self.frameGeometry().height() / self.HEIGHTINBLOCKS * self.zoom
+
+    def world_y(self, y_line):  # y_coord in board pixels, before the camera is applied
+        height = self.tile_height()
+        if y_line == 0:
+            return -height / 2 - self.tile_height() / 5.5 * y_line
+        else:
+            return height / 2 * (y_line - 1) - self.tile_height() / 5.5 * y_line
+
+    def world_x(self, x_line, y_line):
+        width = self.tile_width()
+        if y_line % 2 == 0:
+            return -width / 2 + width * x_line
+        else:
+            return width * x_line
+
+    def y_coord(self, y_line):
+        return self.world_y(y_line) - self.camera_y
+
+    def x_coord(self, x_line, y_line):
+        return self.world_x(x_line, y_line) - self.camera_x
+
+    def squares_in(self, left, top, right, bottom):  # rows and columns of the squares drawn over a board area
+        width = self.tile_width()
+        height = self.tile_height()
+        step = height / 2 - height / 5.5  # between rows
+        game_map = self.simulation.map
+        rows = range(max(int((top - 2 * height) // step), 0), min(int((bottom + height) // step) + 2, game_map.rows))
+        columns = range(max(int((left - width) // width), 0), min(int((right + width) // width) + 1, game_map.columns))
+        return rows, columns
+
+    # PAINTING OF MAP
+    def draw_rect(self, painter, x, y, image, width=None, height=None):
+        if width is None:
+            width = self.tile_width()
+        if height is None:
+            height = self.tile_height()
+        rect = QtCore.QRect(int(x), int(y), int(width), int(height))
+        painter.drawImage(rect, image)
+
+    def draw_sprite(self, painter, x, y, image, width=None, height=None):  # draw_rect without per-frame scaling
+        if width is None:
+            width = self.tile_width()
+        if height is None:
+            height = self.tile_height()
+        painter.drawPixmap(int(x), int(y), self.scaled_sprite(image, int(width), int(height)))
+
+    def scaled_sprite(self, image, width, height):
+        key = (image.cacheKey(), width, height)
+        pixmap = self.scaled_sprites.get(key)
+        if pixmap is None:
+            ratio = self.devicePixelRatioF()
+            if image.isNull():
+                pixmap = QtGui.QPixmap()
+            else:
+                pixmap = QtGui.QPixmap.fromImage(image.scaled(int(width * ratio), int(height * ratio),
+                                                              QtCore.Qt.AspectRatioMode.IgnoreAspectRatio,
+                                                              QtCore.Qt.TransformationMode.SmoothTransformation))
+                pixmap.setDevicePixelRatio(ratio)
+            self.scaled_sprites[key] = pixmap
+        return pixmap
+
+    def paintEvent(self, a0: QtGui.QPaintEvent) -> None:
+        painter = QtGui.QPainter(self)
+        if self.first_frame_time is None:
+            self.first_frame_time = time.perf_counter() - LAUNCH_TIME
+            print("first frame in %.3f s" % self.first_frame_time)
+            QtCore.QTimer.singleShot(0, self.start_music)
+        if self.loading is not None:
+            self.draw_loading(painter)
+            return
+
+        rect = self.contentsRect()
+        board_top = rect.bottom() - self.frameGeometry().height()
+
+        sim = self.simulation
+        if sim.game_over:
+            self.draw_end_menu(painter)
+            return
+
+        self.paint_background(painter, rect, board_top, a0.rect())
+
+        self.paint_towers(painter, rect, board_top)
+        self.paint_shoots(painter)
+        self.paint_units(painter, rect, board_top)
+
+        if self.wave_menu_visible():
+            self.draw_wave_menu(painter)
+        self.draw_menu(painter)
+        if self.profiler is not None:
+            self.draw_profiler(painter)
+        if self.speed != 1:
+            self.draw_speed(painter)
+
+    def wave_menu_visible(self) -> bool:
+        sim = self.simulation
+        return self.wave_menu_delay >= sim.clock % sim.wave_delay > 0
+
+    # DIRTY REGIONS
+    def scene(self):  # set describing everything drawn above the background, compared between frames
+        if self.loading is not None:
+            return {("loading", self.loading.loaded)}
+        sim = self.simulation
+        if sim.game_over:
+            return {("game_over",)}
+
+        rect = self.contentsRect()
+        board_top = rect.bottom() - self.frameGeometry().height()
+        items = set()
+        for x, y, width, height, image in self.tower_sprites(rect, board_top) + self.unit_sprites(rect, board_top):
+            items.add(("sprite", int(x), int(y), int(width), int(height), image.cacheKey()))
+        for x, y, width, height, pixmap in self.projectile_sprites():
+            items.add(("sprite", int(x), int(y), int(width) + 1, int(height) + 1, pixmap.cacheKey()))
+        if self.wave_menu_visible():
+            items.add(("wave_menu", sim.wave_level))
+        items.add(("menu", sim.money_count, sim.castleHP))
+        if self.profiler is not None:
+            items.add(("profiler", self.profiler.ticks))
+        if self.speed != 1:
+            items.add(("speed", self.speed, int(self.tick_rate)))
+        return items
+
+    def item_rect(self, item):
+        kind = item[0]
+        if kind == "sprite":
+            return QtCore.QRect(item[1], item[2], item[3], item[4]).adjusted(-1, -1, 1, 1)
+        elif kind == "wave_menu":
+            return self.wave_menu_rect()
+        elif kind == "menu":
+            return self.menu_rect()
+        elif kind == "profiler":
+            return self.profiler_rect()
+        elif kind == "speed":
+            return self.speed_rect()
+        return self.rect()
+
+    def update_dirty(self):  # repaint only the parts of the scene which changed since the last frame
+        scene = self.scene()
+        changed = scene ^ self.painted_scene
+        self.painted_scene = scene
+        if not changed:
+            return
+        if len(changed) > Board.MAX_DIRTY_RECTS:
+            bounds = QtCore.QRect()
+            for item in changed:
+                bounds = bounds.united(self.item_rect(item))
+            self.update(bounds)
+            return
+        region = QtGui.QRegion()
+        for item in changed:
+            region = region.united(self.item_rect(item))
+        self.update(region)
+
+    def full_update(self):  # repaint everything, e.g. after a new game was loaded
+        self.painted_scene = set()
+        self.update()
+
+    def paint_background(self, painter, rect, board_top, area):  # terrain chunks which intersect area
+        key = (self.tile_width(), self.tile_height(), self.biome)
+        if self.chunks_key != key:
+            self.chunks.clear()
+            self.chunks_key = key
+        size = Board.CHUNK_SIZE
+        for row in range((self.camera_y + area.top()) // size, (self.camera_y + area.bottom()) // size + 1):
+            for column in range((self.camera_x + area.left()) // size, (self.camera_x + area.right()) // size + 1):
+                chunk = self.chunk_pixmap(column, row, rect, board_top)
+                if chunk is not None:
+                    painter.drawPixmap(column * size - self.camera_x, row * size - self.camera_y, chunk)
+
+    def chunk_pixmap(self, column, row, rect, board_top):  # static terrain is rendered once per zoom and biome
+        key = (column, row)
+        if key in self.chunks:
+            self.chunks.move_to_end(key)
+            return self.chunks[key]
+
+        size = Board.CHUNK_SIZE
+        rows, columns = self.squares_in(column * size, row * size, (column + 1) * size, (row + 1) * size)
+        chunk = None
+        if rows and columns:
+            ratio = self.devicePixelRatioF()
+            chunk = QtGui.QPixmap(int(size * ratio), int(size * ratio))
+            chunk.setDevicePixelRatio(ratio)
+            chunk.fill(QtCore.Qt.GlobalColor.transparent)
+            painter = QtGui.QPainter(chunk)
+            painter.translate(-column * size, -row * size)  # squares are drawn at their board pixels
+            self.paint_land(painter, rect, board_top, rows, columns)
+            self.paint_decoration(painter, rect, board_top, rows, columns)
+            painter.end()
+        self.chunks[key] = chunk
+        if len(self.chunks) > Board.MAX_CHUNKS:
+            self.chunks.popitem(last=False)
+        return chunk
+
+    def invalidate_background(self):
+        self.chunks.clear()
+
+    def invalidate_sprites(self):  # tile size changed, pre-scaled sprites are rebuilt on the next paint
+        self.scaled_sprites.clear()
+        self.rotated_sprites.clear()
+        self.batch_sprites.clear()
+        self.batch_rects.clear()
+        self.batch_pages = []
+
+    def set_biome(self, biome):
+        self.biome = biome
+        self.board_generation()
+        self.invalidate_background()
+        self.full_update()
+
+    def resizeEvent(self, a0: QtGui.QResizeEvent) -> None:
+        self.invalidate_background()
+        self.invalidate_sprites()
+        super().resizeEvent(a0)
+
+    def paint_land(self, painter, rect, board_top, rows, columns):  # in board pixels
+        for i in rows:
+            tiles = self.land_tiles[i]
+            for j in columns:
+                y = self.world_y(i)
+                x = self.world_x(j, i)
+                self.draw_rect(painter, rect.left() + x, board_top + y, tiles[j].skin)
+
+    def paint_decoration(self, painter, rect, board_top, rows, columns):
+        for i in rows:
+            for decoration in self.decor.get(i, ()):
+                j = decoration.position[1]
+                if j not in columns:
+                    continue
+                y = self.world_y(i)
+                x = self.world_x(j, i)
+                self.draw_rect(painter, rect.left() + x + self.tile_width() / 5.5,
+                               board_top + y + self.tile_height() / 2.5,
+                               decoration.skin, self.tile_width() / 1.5, self.tile_height() / 1.5)
+
+    def tower_sprites(self, rect, board_top):  # (x, y, width, height, image) of every tower
+        sprites_list = []
+        for archer in self.simulation.archers:
+            coord = archer.position
+            i = coord[0]
+            j = coord[1]
+            y = self.y_coord(i)
+            x = self.x_coord(j, i)
+            x_shift = self.tile_width() / 9
+            y_shift = self.tile_height() / 5
+            width_compression = 1.3
+            height_compression = 1.3
+            sprites_list.append((rect.left() + x + x_shift, board_top + y - y_shift,
+                                 self.tile_width() / width_compression, self.tile_height() / height_compression,
+                                 self.archer_skins[archer.level - 1]))
+
+        for wizard in self.simulation.wizards:
+            coord = wizard.position
+            i = coord[0]
+            j = coord[1]
+            y = self.y_coord(i)
+            x = self.x_coord(j, i)
+            sprites_list.append((rect.left() + x, board_top + y, self.tile_width(), self.tile_height(),
+                                 self.wizard_skins[wizard.level - 1]))
+        return [sprite for sprite in sprites_list if self.in_view(*sprite[:4])]
+
+    def paint_towers(self, painter, rect, board_top):
+        self.draw_batch(painter, self.tower_sprites(rect, board_top))
+
+    def rotated_sprite(self, image, width, height, heading):  # image turned clockwise by heading degrees
+        key = (image.cacheKey(), width, height)
+        table = self.rotated_sprites.get(key)
+        if table is None:  # scale once, then rotate into ROTATION_STEPS directions
+            ratio = self.devicePixelRatioF()
+            scaled = image.scaled(int(width * ratio), int(height * ratio),
+                                  QtCore.Qt.AspectRatioMode.IgnoreAspectRatio,
+                                  QtCore.Qt.TransformationMode.SmoothTransformation)
+            table = []
+            for step in range(Board.ROTATION_STEPS):
+                t = QTransform().rotate(360 * step / Board.ROTATION_STEPS)
+                pixmap = QtGui.QPixmap.fromImage(scaled.transformed(t, QtCore.Qt.TransformationMode.SmoothTransformation))
+                pixmap.setDevicePixelRatio(ratio)
+                table.append(pixmap)
+            self.rotated_sprites[key] = table
+        return table[round(heading * Board.ROTATION_STEPS / 360) % Board.ROTATION_STEPS]
+
+    def projectile_sprites(self):  # (x, y, width, height, pixmap) of arrows and fireballs in flight
+        sim = self.simulation
+        shots = sim.projectiles
+        flying = np.flatnonzero(shots.in_flight(sim.clock))
+        if len(flying) == 0:
+            return []
+        fired = shots.fired[flying]
+        progress = (sim.clock - 1 + self.interpolation - fired) / (shots.arrival[flying] - fired)
+        x1, y1 = self.squares_xy(np.stack((shots.source_i[flying], shots.source_j[flying]), axis=1))
+        x2, y2 = self.squares_xy(sim.road_array[shots.target_index[flying]])
+
+        # projectiles chase their target, or fly on to the square they were aimed at once it is gone
+        arrows = shots.kind[flying] == ARROW
+        n = sim.enemies.count
+        if n:
+            uid = sim.enemies.uid[:n]
+            target_uid = shots.target_uid[flying]
+            rows = np.minimum(np.searchsorted(uid, target_uid), n - 1)
+            chasing = uid[rows] == target_uid
+            rows = rows[chasing]
+            x, y = self.squares_xy(sim.enemy_positions()[rows])
+            x_previous, y_previous = self.squares_xy(sim.enemy_previous_positions()[rows])
+            x2[chasing] = x_previous + (x - x_previous) * self.interpolation
+            y2[chasing] = y_previous + (y - y_previous) * self.interpolation
+        x_shift = np.where(arrows, self.tile_width() / 2, 0)
+        y_shift = np.where(arrows, self.tile_height() / 4, 0)
+        x1, x2 = x1 + x_shift, x2 + x_shift
+        y1, y2 = y1 + y_shift, y2 + y_shift
+        x = x1 + (x2 - x1) * progress
+        y = y1 + (y2 - y1) * progress
+        heading = np.degrees(np.arctan2(x2 - x1, y1 - y2))  # sprites point up
+
+        sizes = {True: (self.arrow, int(self.tile_width() / 6), int(self.tile_height() / 3)),
+                 False: (self.fireball, int(self.tile_width() / 8), int(self.tile_height() / 6))}
+        projectiles = []
+        for x, y, heading, arrow in zip(x.tolist(), y.tolist(), heading.tolist(), arrows.tolist()):
+            image, width, height = sizes[arrow]
+            if image.isNull():
+                continue
+            pixmap = self.rotated_sprite(image, width, height, heading)
+            pixmap_width = pixmap.width() / pixmap.devicePixelRatio()
+            pixmap_height = pixmap.height() / pixmap.devicePixelRatio()
+            sprite = (x - pixmap_width / 2, y - pixmap_height / 2, pixmap_width, pixmap_height, pixmap)
+            if self.in_view(*sprite[:4]):
+                projectiles.append(sprite)
+        return projectiles
+
+    def paint_shoots(self, painter):
+        for x, y, width, height, pixmap in self.projectile_sprites():
+            painter.drawPixmap(int(x), int(y), pixmap)
+
+    def unit_sprites(self, rect, board_top):  # (x, y, width, height, image) of every enemy
+        sim = self.simulation
+        levels = sim.enemies.level[:sim.enemies.count]
+        alpha = self.interpolation
+        x_shift = self.tile_width() / 4 + 10
+        y_shift = 10
+        width_compression = 3
+        height_compression = 3
+        width = self.tile_width() / width_compression
+        height = self.tile_height() / height_compression
+        x, y = self.squares_xy(sim.enemy_positions())
+        x_previous, y_previous = self.squares_xy(sim.enemy_previous_positions())
+        x = x_previous + (x - x_previous) * alpha  # slide from the previous square during the tick
+        y = y_previous + (y - y_previous) * alpha
+        x = rect.left() + x + x_shift
+        y = board_top + y + y_shift
+        visible = (x + width >= 0) & (y + height >= 0) & (x <= self.width()) & (y <= self.height())
+        if not visible.all():
+            x, y, levels = x[visible], y[visible], levels[visible]
+        skins = self.ufo_skins
+        return [(x, y, width, height, skins[level - 1]) for x, y, level in zip(x.tolist(), y.tolist(), levels.tolist())]
+
+    def squares_xy(self, squares):  # x_coord and y_coord of an (n, 2) array of squares
+        i = squares[:, 0]
+        j = squares[:, 1]
+        width = self.tile_width()
+        height = self.tile_height()
+        x = np.where(i % 2 == 0, -width / 2 + width * j, width * j) - self.camera_x
+        y = np.where(i == 0, -height / 2, height / 2 * (i - 1)) - height / 5.5 * i - self.camera_y
+        return x, y
+
+    def paint_units(self, painter, rect, board_top):
+        self.draw_batch(painter, self.unit_sprites(rect, board_top))
+
+    def draw_batch(self, painter, sprites_list):  # draw_sprite for many sprites, one call per atlas page
+        images = {}
+        keys = []
+        for x, y, width, height, image in sprites_list:
+            key = (image.cacheKey(), int(width), int(height))
+            images[key] = image
+            keys.append(key)
+        missing = [key for key in images if key not in self.batch_rects]
+        if missing:
+            self.batch_sprites.update((key, (images[key], key[1], key[2])) for key in missing)
+            self.build_batch_pages()
+
+        batch_rects = self.batch_rects
+        create = QtGui.QPainter.PixmapFragment.create
+        point = QtCore.QPointF
+        scale = 1 / self.devicePixelRatioF()
+        fragments = [[] for _ in self.batch_pages]
+        for key, (x, y, width, height, image) in zip(keys, sprites_list):
+            page, source, half_width, half_height = batch_rects[key]
+            if page is not None:
+                fragments[page].append(create(point(int(x) + half_width, int(y) + half_height), source, scale, scale))
+        for page, page_fragments in zip(self.batch_pages, fragments):
+            if page_fragments:
+                painter.drawPixmapFragments(page_fragments, page)
+
+    def build_batch_pages(self):  # pack the pre-scaled batch_sprites into atlas pages
+        keys = [key for key, (image, width, height) in self.batch_sprites.items() if not image.isNull()]
+        images = [self.scaled_sprite(*self.batch_sprites[key]).toImage() for key in keys]
+        positions, heights = atlas.pack([(image.width(), image.height()) for image in images])
+        width = max((x + image.width() + atlas.PADDING for image, (page, x, y) in zip(images, positions)), default=1)
+        self.batch_pages = [QtGui.QPixmap.fromImage(page)
+                            for page in atlas.paint_pages(images, positions, heights, width)]
+        scale = 1 / self.devicePixelRatioF()
+        self.batch_rects = dict.fromkeys(self.batch_sprites, (None, None, 0, 0))  # null images draw nothing
+        for key, image, (page, x, y) in zip(keys, images, positions):
+            self.batch_rects[key] = (page, QtCore.QRectF(x, y, image.width(), image.height()),
+                                     image.width() * scale / 2, image.height() * scale / 2)
+
+    def draw_end_menu(self, painter):
+        self.draw_rect(painter, 0, 0, self.end_menu_background,
+                       width=self.frameGeometry().width(), height=self.frameGeometry().height())
+
+    def draw_wave_menu(self, painter):
+        x_wave = self.frameGeometry().width() / 100 * 65  # x coord of wave block
+        y_wave = self.frameGeometry().height() / 100 * 78  # y coord of wave block
+        self.draw_sprite(painter, x_wave, y_wave, self.wave_menu,
+                       width=self.tile_width() * 2.5, height=self.tile_height() * 1.4)
+        self.draw_sprite(painter, x_wave * 1.09, y_wave * 1.09, self.alien,
+                       width=self.tile_width() / 3, height=self.tile_height() / 2)
+
+        font = painter.font()
+        font.setPixelSize(50)
+        painter.setFont(font)
+
+        painter.drawText(int(x_wave * 1.18), int(y_wave * 1.09), 300, 200, 0, "WAVE " + str(self.simulation.wave_level))
+
+    def wave_menu_rect(self):  # area covered by draw_wave_menu
+        x_wave = self.frameGeometry().width() / 100 * 65
+        y_wave = self.frameGeometry().height() / 100 * 78
+        return QtCore.QRect(int(x_wave), int(y_wave), int(self.tile_width() * 2.5), int(self.tile_height() * 1.4)) \
+            .united(QtCore.QRect(int(x_wave * 1.18), int(y_wave * 1.09), 300, 200))
+
+    def menu_rect(self):  # area covered by draw_menu
+        x_menu = self.frameGeometry().width() / 100 * 65
+        y_menu = self.frameGeometry().height() / 100
+        return QtCore.QRect(int(x_menu), int(y_menu), int(self.tile_width() * 2.5), int(self.tile_height() * 1.4)) \
+            .united(QtCore.QRect(int(x_menu * 1.08), int(y_menu * 9), 100, 200)) \
+            .united(QtCore.QRect(int(x_menu * 1.24), int(y_menu * 9), 100, 200))
+
+    def draw_menu(self, painter):
+        x_menu = self.frameGeometry().width() / 100 * 65  # x coord of menu block
+        y_menu = self.frameGeometry().height() / 100  # y coord of menu block
+
+        self.draw_sprite(painter, x_menu, y_menu, self.menu,
+                       width=self.tile_width() * 2.5, height=self.tile_height() * 1.4)
+        self.draw_sprite(painter, x_menu * 1.32, y_menu * 8.2, self.heart,
+                       width=self.tile_width() / 3, height=self.tile_height() / 3)
+
+        self.draw_sprite(painter, x_menu * 1.16, y_menu * 8, self.coins,
+                       width=self.tile_width() / 4, height=self.tile_height() / 3)
+        self.draw_sprite(painter, x_menu * 1.32, y_menu * 8.2, self.heart,
+                       width=self.tile_width() / 3, height=self.tile_height() / 3)
+
+        font = painter.font()
+        font.setPixelSize(25)
+        painter.setFont(font)
+
+        painter.drawText(int(x_menu * 1.08), int(y_menu * 9), 100, 200, 0, str(self.simulation.money_count))
+        painter.drawText(int(x_menu * 1.24), int(y_menu * 9), 100, 200, 0, str(self.simulation.castleHP))
+
+    def profiler_rect(self):  # area covered by draw_profiler
+        return QtCore.QRect(10, 10, 460, 20 * (len(self.profiler.phases) + 3))
+
+    def draw_profiler(self, painter):
+        rect = self.profiler_rect()
+        painter.fillRect(rect, QtGui.QColor(0, 0, 0, 160))
+        painter.setPen(QtGui.QColor("white"))
+        font = QtGui.QFont("monospace")
+        font.setStyleHint(QtGui.QFont.StyleHint.TypeWriter)
+        font.setPixelSize(14)
+        painter.setFont(font)
+        for n, line in enumerate(self.profiler.report()):
+            painter.drawText(rect.left() + 8, rect.top() + 20 * (n + 1), line)
+
+    def speed_rect(self):  # area covered by draw_speed
+        return QtCore.QRect(10, self.height() - 44, 300, 34)
+
+    def draw_speed(self, painter):
+        rect = self.speed_rect()
+        painter.fillRect(rect, QtGui.QColor(0, 0, 0, 160))
+        painter.setPen(QtGui.QColor("white"))
+        font = painter.font()
+        font.setPixelSize(18)
+        painter.setFont(font)
+        label = "max" if self.speed is None else "%d\u00d7" % self.speed
+        painter.drawText(rect.adjusted(10, 0, -10, 0), QtCore.Qt.AlignmentFlag.AlignVCenter,
+                         "%s  %.0f ticks/s" % (label, self.tick_rate))
+
+
+class Tile:
+    __slots__ = ("position", "skin")
+
+    def __init__(self, coord, skin):  # (i, j) coord
+        self.position = coord
+        self.skin = skin
+
+
+class Road(Tile):
+    __slots__ = ("type",)
+
+    def __init__(self, coord, biome, tile_type):  # (i, j) coord, str biome : {"spring", "winter", "desert"},
+        # str tile_type : {"left", "right", "right_top_crossroad",
+        # "right_bottom_crossroad", "left_top_crossroad",
+        # "left_bottom_crossroad",  "bottom_twist", "top_twist",
+        # "right_twist", "left_twist"}
+        biome = biome.title()
+        skin = sprites.image("Sprites/Road tiles/" + biome + "/" + tile_type + ".png")
+
+        super().__init__(coord, skin)
+        self.type = tile_type  # maybe will be needed
+
+
+class Landscape(Tile):
+    __slots__ = ("tower_place",)
+
+    def __init__(self, coord, biome, tower_place=False):  # (i, j) coord,
+        # str biome = {"spring", "winter", "desert"}, bool tower_place
+        desert_biome = ["Sprites/Landscape tiles/sand.png",
+                        "Sprites/Landscape tiles/buildingPlaceSand.png"]
+        spring_biome = ["Sprites/Landscape tiles/grass.png",
+                        "Sprites/Landscape tiles/buildingPlaceGrass.png"]
+        winter_biome = ["Sprites/Landscape tiles/snow.png",
+                        "Sprites/Landscape tiles/buildingPlaceSnow.png"]
+
+        skin = QtGui.QImage()
+
+        if biome == "desert":
+            if tower_place:
+                skin = sprites.image(desert_biome[1])
+            else:
+                skin = sprites.image(desert_biome[0])
+        elif biome == "spring":
+            if tower_place:
+                skin = sprites.image(spring_biome[1])
+            else:
+                skin = sprites.image(spring_biome[0])
+        elif biome == "winter":
+            if tower_place:
+                skin = sprites.image(winter_biome[1])
+            else:
+                skin = sprites.image(winter_biome[0])
+
+        super().__init__(coord, skin)
+        self.tower_place = tower_place
+
+
+class EnvironmentalTiles(Tile):
+    __slots__ = ()
+
+    def __init__(self, coord, biome, tile_type):  # (i, j) coord, str biome = {"spring", "winter", "desert"},
+
+        winter_biome = ["Sprites/Enviroument tiles/winter/circle_tree.png",
+                        "Sprites/Enviroument tiles/winter/normal_tree.png",
+                        "Sprites/Enviroument tiles/winter/snowdrift1.png",
+                        "Sprites/Enviroument tiles/winter/snowdrift2.png"]
+
+        spring_biome = ["Sprites/Enviroument tiles/spring/circle_tree.png",
+                        "Sprites/Enviroument tiles/spring/normal_tree.png",
+                        "Sprites/Enviroument tiles/spring/gray_stone.png",
+                        "Sprites/Enviroument tiles/spring/gray_big_stone.png"]
+
+        desert_biome = ["Sprites/Enviroument tiles/desert/cactus1.png",
+                        "Sprites/Enviroument tiles/desert/cactus2.png",
+                        "Sprites/Enviroument tiles/desert/sandstone.png",
+                        "Sprites/Enviroument tiles/desert/big_sandstone.png"]
+
+        skin = QtGui.QImage()
+
+        if biome == "desert":
+            if tile_type == "plant1":
+                skin = sprites.image(desert_biome[0])
+            elif tile_type == "plant2":
+                skin = sprites.image(desert_biome[1])
+            elif tile_type == "decoration1":
+                skin = sprites.image(desert_biome[2])
+            else:
+                skin = sprites.image(desert_biome[3])
+
+        elif biome == "spring":
+            if tile_type == "plant1":
+                skin = sprites.image(spring_biome[0])
+            elif tile_type == "plant":
+                skin = sprites.image(spring_biome[1])
+            elif tile_type == "decoration1":
+                skin = sprites.image(spring_biome[2])
+            else:
+                skin = sprites.image(spring_biome[3])
+
+        elif biome == "winter":
+            if tile_type == "plant1":
+                skin = sprites.image(winter_biome[0])
+            elif tile_type == "plant2":
+                skin = sprites.image(winter_biome[1])
+            elif tile_type == "decoration1":
+                skin = sprites.image(winter_biome[2])
+            else:
+                skin = sprites.image(winter_biome[3])
+
+        super().__init__(coord, skin)
+
+
+class BuyMenu(QLabel):
+    def __init__(self):
+        super().__init__()
+
+        self.setWindowTitle("Buy menu")
+        self.setFixedSize(250, 200)
+        self.archer_cost = 150
+        self.wizard_cost = 200
+        self.archer_buy = False
+        self.wizard_buy = False
+
+        style = """
+            QLabel {
+                color: gold;
+                background-color: grey;
+                font-family: Arial;
+                font-style: bold;
+            }
+        """
+
+        self.setStyleSheet(style)
+
+    def paintEvent(self, a0: QtGui.QPaintEvent) -> None:
+        painter = QtGui.QPainter(self)
+        archer_rect = QtCore.QRect(int(10), int(10), int(100), int(100))
+        wizard_rect = QtCore.QRect(int(150), int(10), int(100), int(100))
+
+        painter.drawImage(archer_rect, sprites.image("Sprites/Towers/Archer/archer_level_1.png"))
+        painter.drawImage(wizard_rect, sprites.image("Sprites/Towers/Wizard/wizard_level_1.png"))
+
+        font = painter.font()
+        font.setPixelSize(25)
+        painter.setFont(font)
+
+        painter.drawText(35, 130, 100, 100, 0, str(self.archer_cost))
+        painter.drawText(175, 130, 100, 200, 0, str(self.wizard_cost))
+
+    def mousePressEvent(self, a0: QtGui.QMouseEvent) -> None:
+        if 10 <= a0.x() <= 110 and 10 <= a0.y() <= 110:
+            self.archer_buy = True
+            self.close()
+
+        elif 150 <= a0.x() <= 250 and 10 <= a0.y() <= 110:
+            self.wizard_buy = True
+            self.close()
+
+
+class UpgradeMenu(QLabel):
+    def __init__(self):
+        super().__init__()
+
+        self.setWindowTitle("Upgrade menu")
+        self.setFixedSize(250, 200)
+        self.archer_cost = 500
+        self.archer_buy = False
+        self.level = 1
+
+        style = """
+            QLabel {
+                color: gold;
+                background-color: grey;
+                font-family: Arial;
+                font-style: bold;
+            }
+        """
+
+        self.setStyleSheet(style)
+
+    def paintEvent(self, a0: QtGui.QPaintEvent) -> None:
+        painter = QtGui.QPainter(self)
+        archer_rect = QtCore.QRect(int(70), int(10), int(100), int(100))
+
+        if self.level == 1:
+            painter.drawImage(archer_rect, sprites.image("Sprites/Towers/Archer/archer_level_2.png"))
+        elif self.level == 2:
+            painter.drawImage(archer_rect, sprites.image("Sprites/Towers/Archer/archer_level_3.png"))
+
+        font = painter.font()
+        font.setPixelSize(25)
+        painter.setFont(font)
+
+        painter.drawText(100, 130, 100, 100, 0, str(self.archer_cost))
+
+    def mousePressEvent(self, a0: QtGui.QMouseEvent) -> None:
+        if 70 <= a0.x() <= 170 and 10 <= a0.y() <= 110:
+            self.archer_buy = True
+            self.close()
+
+
+class MainWindow(QtWidgets.QMainWindow):
+    def __init__(self, seed=None, **params):
+        super(MainWindow, self).__init__()
+
+        self.board = Board(self, seed, **params)
+        self.setCentralWidget(self.board)
+        self.setGeometry(100, 50, 1500, 950)
+        self.setWindowTitle("Ultra tower defence")
+        self.board.start()
+        self.show()
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    from replay import InputRecorder
+
+    parser = argparse.ArgumentParser(description="Ultra tower defence")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the first game")
+    parser.add_argument("--record", metavar="PATH", default=None,
+                        help="write player inputs to an input log for replay.py")
+    parser.add_argument("--load", metavar="PATH", default=None, help="resume the game saved in a snapshot")
+    parser.add_argument("--map", metavar="PATH", default=None, help="map file to play, see maps.py")
+    parser.add_argument("--profile-csv", metavar="PATH", default=None,
+                        help="start with the profiler overlay on and stream per tick timings to a CSV file")
+    args, qt_args = parser.parse_known_args()
+    if args.load is not None and args.record is not None:  # an input log replays from a fresh game
+        parser.error("--record cannot be combined with --load")
+
+    app = QtWidgets.QApplication(sys.argv[:1] + qt_args)
+    MainWindow = MainWindow(args.seed, **({} if args.map is None else {"map_path": args.map}))
+    if args.load is not None:
+        MainWindow.board.load_game(args.load)
+    if args.record is not None:
+        recorder = InputRecorder(args.record, MainWindow.board.simulation)
+        app.aboutToQuit.connect(recorder.close)
+    if args.profile_csv is not None:
+        MainWindow.board.profile_csv = args.profile_csv
+        MainWindow.board.toggle_profiler()
+        app.aboutToQuit.connect(MainWindow.board.stop_profiler)
+    MainWindow.show()
+    sys.exit(app.exec_())
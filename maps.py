@@ -0,0 +1,189 @@
+import argparse
+import functools
+import json
+import os
+
+import numpy as np
+
+DEFAULT_MAP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "maps", "default.json")
+
+# Map file: JSON with the terrain as rows of characters, the road as the ordered list of
+# squares from the spawn point to the castle, tower places in purchase menu order and
+# decorations. Squares are [i, j]: i is the row, j the column of the staggered grid.
+# Maps with branches list the spawn points; road tiles missing from the road list are
+# walkable all the same, enemies follow the road tiles' openings to the castle.
+LAND = "."
+TOWER_PLACE = "o"
+ROAD_TILES = {"r": "right",  # road along the up-left / down-right axis
+              "l": "left",  # road along the up-right / down-left axis
+              "L": "left_twist",  # turn pointing right
+              "R": "right_twist",  # turn pointing left
+              "T": "top_twist",  # turn pointing down
+              "B": "bottom_twist",  # turn pointing up
+              "+": "full_crossroad",
+              "1": "left_top_crossroad",  # closed down-right
+              "2": "right_top_crossroad",  # closed down-left
+              "3": "left_bottom_crossroad",  # closed up-right
+              "4": "right_bottom_crossroad"}  # closed up-left
+
+UP_LEFT, UP_RIGHT, DOWN_LEFT, DOWN_RIGHT = (-1, -1), (-1, 1), (1, -1), (1, 1)  # see direction()
+ROAD_OPENINGS = {"r": {UP_LEFT, DOWN_RIGHT},  # directions in which a road tile leads
+                 "l": {UP_RIGHT, DOWN_LEFT},
+                 "L": {UP_LEFT, DOWN_LEFT},
+                 "R": {UP_RIGHT, DOWN_RIGHT},
+                 "T": {UP_LEFT, UP_RIGHT},
+                 "B": {DOWN_LEFT, DOWN_RIGHT},
+                 "+": {UP_LEFT, UP_RIGHT, DOWN_LEFT, DOWN_RIGHT},
+                 "1": {UP_LEFT, UP_RIGHT, DOWN_LEFT},
+                 "2": {UP_LEFT, UP_RIGHT, DOWN_RIGHT},
+                 "3": {UP_LEFT, DOWN_LEFT, DOWN_RIGHT},
+                 "4": {UP_RIGHT, DOWN_LEFT, DOWN_RIGHT}}
+
+
+def neighbours(square):  # squares sharing an edge with square: odd rows are shifted right by half a square
+    i, j = square
+    shift = 1 if i % 2 else -1
+    return [(i - 1, j), (i - 1, j + shift), (i + 1, j), (i + 1, j + shift)]
+
+
+def direction(square, other):  # (rows down, half squares right) from square to its neighbour other
+    half_columns = 2 * (other[1] - square[1]) + (other[0] % 2) - (square[0] % 2)
+    return other[0] - square[0], half_columns
+
+
+def road_tile(square, linked):  # terrain character of a road square linked to the given neighbours
+    directions = {direction(square, other) for other in linked}
+    if len(directions) == 1:  # end of the road, continue the axis
+        (down, right), = directions
+        directions.add((-down, -right))
+    for kind, openings in ROAD_OPENINGS.items():
+        if openings == directions:
+            return kind
+    raise ValueError("Road square %s has no tile for its neighbours %s" % (list(square), sorted(linked)))
+
+
+class GameMap:
+    def __init__(self, terrain, road, castle, tower_places=None, decor=(), biome="spring", spawns=None):
+        self.rows = len(terrain)
+        self.columns = max((len(row) for row in terrain), default=0)
+        self.terrain = [row.ljust(self.columns, LAND) for row in terrain]
+        self.road = [tuple(square) for square in road]
+        listed = set(self.road)
+        self.road += [(i, j) for i, row in enumerate(self.terrain) for j, kind in enumerate(row)
+                      if kind in ROAD_TILES and (i, j) not in listed]  # branches, after the listed road
+        self.spawns = [tuple(square) for square in (spawns or self.road[:1])]
+        self.castle = tuple(castle)
+        if tower_places is None:
+            tower_places = [(i, j) for i, row in enumerate(self.terrain) for j, kind in enumerate(row)
+                            if kind == TOWER_PLACE]
+        self.tower_places = [tuple(place) for place in tower_places]
+        self.decor = sorted((i, j, kind) for i, j, kind in decor)  # drawn in row order like the terrain
+        self.biome = biome
+
+        for i, j in self.road:
+            if self.tile(i, j) not in ROAD_TILES:
+                raise ValueError("Road square %s is not a road tile" % [i, j])
+        if self.castle not in self.road:
+            raise ValueError("The castle %s is not on the road" % list(self.castle))
+        for square in self.spawns:
+            if square not in self.road:
+                raise ValueError("Spawn point %s is not on the road" % list(square))
+        for i, j in self.tower_places:
+            if self.tile(i, j) != TOWER_PLACE:
+                raise ValueError("Tower place %s is not a tower place tile" % [i, j])
+
+    def tile(self, i, j):
+        if 0 <= i < self.rows and 0 <= j < self.columns:
+            return self.terrain[i][j]
+        return None
+
+    def links(self, square):  # road squares an enemy can walk to from square
+        openings = ROAD_OPENINGS[self.tile(*square)]
+        linked = []
+        for other in neighbours(square):
+            kind = self.tile(*other)
+            if kind in ROAD_OPENINGS and direction(square, other) in openings \
+                    and direction(other, square) in ROAD_OPENINGS[kind]:
+                linked.append(other)
+        return linked
+
+    def to_dict(self):
+        return {"biome": self.biome,
+                "terrain": self.terrain,
+                "road": [list(square) for square in self.road],
+                "castle": list(self.castle),
+                "spawns": [list(square) for square in self.spawns],
+                "tower_places": [list(place) for place in self.tower_places],
+                "decor": [list(item) for item in self.decor]}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["terrain"], data.get("road", ()), data["castle"], data.get("tower_places"),
+                   data.get("decor", ()), data.get("biome", "spring"), data.get("spawns"))
+
+
+@functools.lru_cache(maxsize=16)
+def load_map(path=DEFAULT_MAP) -> GameMap:  # maps are not changed after loading, so games share them
+    with open(path) as map_file:
+        return GameMap.from_dict(json.load(map_file))
+
+
+def save_map(game_map, path):  # one terrain row per line, so that the map can be edited in a text editor
+    data = game_map.to_dict()
+    terrain = data.pop("terrain")
+    with open(path, "w") as map_file:
+        map_file.write('{"terrain": [\n  ' + ",\n  ".join(json.dumps(row) for row in terrain) + "\n ],\n")
+        map_file.write(",\n".join(" %s: %s" % (json.dumps(key), json.dumps(value, separators=(",", ":")))
+                                   for key, value in data.items()))
+        map_file.write("\n}\n")
+
+
+def generated_map(rows, columns, seed=0, biome="spring"):
+    # A zigzag road from the top left to the bottom of a rows x columns map, tower places
+    # along it and scattered decorations, e.g. to test big maps.
+    rng = np.random.default_rng(seed)
+    road = [(0, 1)]
+    step = 1  # half squares to the right per row
+    while road[-1][0] < rows - 1:
+        i, j = road[-1]
+        right = 2 * j + i % 2 + step
+        if not 1 <= right <= 2 * columns - 3:  # turn at the edges of the map
+            step = -step
+            right = 2 * j + i % 2 + step
+        road.append((i + 1, (right - (i + 1) % 2) // 2))
+
+    terrain = [[LAND] * columns for _ in range(rows)]
+    for n, square in enumerate(road):
+        linked = road[max(n - 1, 0):n] + road[n + 1:n + 2]
+        terrain[square[0]][square[1]] = road_tile(square, linked)
+
+    tower_places = []
+    for i, j in road[3::6]:
+        for place in ((i, j + 2), (i, j - 2)):
+            if 0 <= place[1] < columns and terrain[place[0]][place[1]] == LAND:
+                terrain[place[0]][place[1]] = TOWER_PLACE
+                tower_places.append(place)
+                break
+
+    decor = {}
+    for i, j in zip(rng.integers(0, rows, rows * columns // 20).tolist(),
+                    rng.integers(0, columns, rows * columns // 20).tolist()):
+        if terrain[i][j] == LAND:
+            decor[i, j] = ["plant1", "plant2", "decoration1"][(i + j) % 3]
+    decor = [(i, j, kind) for (i, j), kind in decor.items()]
+    return GameMap(["".join(row) for row in terrain], road, road[-1], tower_places, decor, biome)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a generated map, e.g. to try big maps.")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("columns", type=int)
+    parser.add_argument("-o", "--output", required=True, help="map file to write")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--biome", default="spring", choices=["spring", "winter", "desert"])
+    args = parser.parse_args()
+    save_map(generated_map(args.rows, args.columns, args.seed, args.biome), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import argparse
+import copy
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from simulation import Simulation
+from snapshot import state_arrays, state_meta
+from sweep import apply_action
+
+# Transposition table file: JSON mapping "state hash action" to the outcome of the action in
+# that state, the hash of the next state or null when the action never became affordable,
+# and "state hash finish" to the score of playing on without buying anything. Bump
+# CACHE_VERSION whenever the game rules change, tables of other versions are dropped.
+CACHE_VERSION = 2
+
+
+def state_hash(sim, max_ticks):  # digest of everything the rest of a game depends on, up to max_ticks
+    digest = hashlib.blake2b(digest_size=16)
+    meta = state_meta(sim)
+    meta["map"] = sim.map.to_dict()  # the map itself, its file may have been edited since
+    meta["max_ticks"] = max_ticks
+    digest.update(json.dumps(meta, sort_keys=True).encode())
+    for name, array in state_arrays(sim).items():
+        digest.update(name.encode())
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def fork(sim):  # independent copy of a game, the map and the caches derived from it are shared
+    flow = copy.copy(sim.flow)
+    flow.blocked = sim.flow.blocked.copy()
+    flow.distance = sim.flow.distance.copy()
+    flow.next_cell = sim.flow.next_cell.copy()
+    shared = [sim.map, sim.coverage, sim.road, sim.road_index, sim.road_array, sim.tower_places]
+    memo = {id(value): value for value in shared}
+    memo[id(sim.flow)] = flow
+    memo[id(sim.flow.next_cell)] = flow.next_cell
+    return copy.deepcopy(sim, memo)
+
+
+def layout_actions(layout, places, max_level):  # actions which can follow a layout
+    levels = {}  # place -> level of the archer on it, 0 for a wizard
+    for kind, place in layout:
+        if kind == "upgrade":
+            levels[place] += 1
+        else:
+            levels[place] = 1 if kind == "archer" else 0
+    actions = []
+    for place in range(places):
+        if place not in levels:
+            actions += [["archer", place], ["wizard", place]]
+        elif 0 < levels[place] < max_level:
+            actions.append(["upgrade", place])
+    return actions
+
+
+class Optimizer:
+    # Beam search over build orders in the layout format of sweep.py: every layout of the
+    # beam is extended by each possible action and the best ones by score go on. Layouts
+    # with a common prefix share the game state after it, so a prefix is played once, and
+    # the transposition table skips every game step which an earlier run already played.
+    def __init__(self, seeds=(0,), params=None, max_ticks=20000, cache_path=None):
+        self.seeds = list(seeds)
+        self.params = params or {}
+        self.max_ticks = max_ticks
+        self.cache_path = cache_path
+        self.table = {}
+        if cache_path is not None and os.path.exists(cache_path):
+            with open(cache_path) as cache_file:
+                data = json.load(cache_file)
+            if data.get("version") == CACHE_VERSION:
+                self.table = data["entries"]
+        self.nodes = {seed: {(): [None, None]} for seed in self.seeds}  # seed -> layout -> [state hash, game]
+        self.hits = 0
+        self.misses = 0
+        self.ticks = 0  # ticks played, the work the table did not save
+
+        reference = Simulation(self.seeds[0], **self.params)
+        self.places = len(reference.tower_places)
+        self.max_level = reference.max_tower_level
+
+    def game(self, seed, layout):  # the game right after the last action of layout, played on demand
+        node = self.nodes[seed][layout]
+        if node[1] is None:
+            if not layout:
+                node[1] = Simulation(seed, **self.params)
+            else:
+                node[1] = self.play(self.game(seed, layout[:-1]), layout[-1])
+        return node[1]
+
+    def node_hash(self, seed, layout):
+        node = self.nodes[seed][layout]
+        if node[0] is None:
+            node[0] = state_hash(self.game(seed, layout), self.max_ticks)
+        return node[0]
+
+    def play(self, sim, action):  # a fork of sim in which action was performed as soon as it was affordable
+        sim = fork(sim)
+        start = sim.tick_count
+        while not apply_action(sim, list(action)):
+            if sim.game_over or sim.tick_count >= self.max_ticks:
+                self.ticks += sim.tick_count - start
+                return None
+            sim.tick()
+        self.ticks += sim.tick_count - start
+        return sim
+
+    def lookup(self, key, compute):
+        if key in self.table:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.table[key] = compute()
+        return self.table[key]
+
+    def extend(self, seed, layout, action) -> bool:  # add the node of layout + action, False if it is a dead end
+        child = layout + (tuple(action),)
+        if child in self.nodes[seed]:
+            return self.nodes[seed][child][0] is not None
+        parent_hash = self.node_hash(seed, layout)
+
+        def compute():
+            sim = self.play(self.game(seed, layout), action)
+            if sim is None:
+                return None
+            self.nodes[seed][child] = [None, sim]
+            return self.node_hash(seed, child)
+        child_hash = self.lookup("%s %s %d" % (parent_hash, action[0], action[1]), compute)
+        if child_hash is None:
+            return False
+        self.nodes[seed].setdefault(child, [child_hash, None])
+        return True
+
+    def finish(self, seed, layout):  # (wave reached, ticks survived, castle HP, money) without further purchases
+        def compute():
+            sim = fork(self.game(seed, layout))
+            start = sim.tick_count
+            sim.step(self.max_ticks - sim.tick_count)
+            self.ticks += sim.tick_count - start
+            return [sim.wave_level, sim.tick_count, sim.castleHP, sim.money_count]
+        return self.lookup(self.node_hash(seed, layout) + " finish", compute)
+
+    def score(self, layout):  # mean score over the seeds, None if an action is never affordable
+        scores = []
+        for seed in self.seeds:
+            if layout and not self.extend(seed, layout[:-1], layout[-1]):
+                return None
+            scores.append(self.finish(seed, layout))
+        return tuple(np.mean(scores, axis=0).tolist())
+
+    def search(self, depth=5, beam=4):  # best layout and its score over layouts of up to depth actions
+        best = ((), self.score(()))
+        frontier = [best]
+        for _ in range(depth):
+            candidates = []
+            for layout, _score in frontier:
+                for action in layout_actions(layout, self.places, self.max_level):
+                    child = layout + (tuple(action),)
+                    child_score = self.score(child)
+                    if child_score is not None:
+                        candidates.append((child, child_score))
+            if not candidates:
+                break
+            candidates.sort(key=lambda candidate: candidate[1], reverse=True)
+            frontier = candidates[:beam]
+            if frontier[0][1] > best[1]:
+                best = frontier[0]
+            self.prune(frontier)
+        return [list(action) for action in best[0]], best[1]
+
+    def prune(self, frontier):  # drop the games of the layouts which will not be extended any more
+        keep = {layout for layout, _score in frontier}
+        for nodes in self.nodes.values():
+            for layout, node in nodes.items():
+                if layout and layout not in keep:
+                    node[1] = None
+
+    def save(self):
+        if self.cache_path is not None:
+            with open(self.cache_path, "w") as cache_file:
+                json.dump({"version": CACHE_VERSION, "entries": self.table}, cache_file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search tower build orders with headless games.")
+    parser.add_argument("--depth", type=int, default=5, help="max actions in a build order")
+    parser.add_argument("--beam", type=int, default=4, help="build orders kept at each depth")
+    parser.add_argument("--max-ticks", type=int, default=20000, help="length of the evaluation games")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0], help="games a build order is scored on")
+    parser.add_argument("--params", default=None, help="JSON file with Simulation parameters, e.g. map_path")
+    parser.add_argument("--cache", default="optimizer_cache.json", help="transposition table kept between runs")
+    parser.add_argument("-o", "--output", default=None, help="JSON file for the best layout, usable in a sweep grid")
+    args = parser.parse_args()
+
+    params = {}
+    if args.params is not None:
+        with open(args.params) as params_file:
+            params = json.load(params_file)
+
+    optimizer = Optimizer(args.seeds, params, args.max_ticks, args.cache)
+    start = time.perf_counter()
+    layout, score = optimizer.search(args.depth, args.beam)
+    optimizer.save()
+    print("best layout: %s" % json.dumps(layout))
+    print("wave %.1f, %.0f ticks, castle HP %.0f, money %.0f" % score)
+    print("%.1f s, %d ticks played, table hits %d, misses %d" % (time.perf_counter() - start, optimizer.ticks,
+                                                                optimizer.hits, optimizer.misses))
+    if args.output is not None:
+        with open(args.output, "w") as output_file:
+            json.dump({"layouts": [layout], "seeds": args.seeds}, output_file)
+
+
+if __name__ == "__main__":
+    main()
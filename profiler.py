@@ -0,0 +1,118 @@
+import csv
+import os
+import time
+
+import numpy as np
+
+SIMULATION_PHASES = ("units_move", "castle_damage", "units_destroy", "shelling", "projectiles_land", "get_money",
+                     "enemy_wave", "add_enemy_to_fight")
+BOARD_PHASES = ("paintEvent", "paint_background", "chunk_pixmap", "paint_land", "paint_decoration", "paint_towers",
+                "paint_shoots", "paint_units", "draw_menu", "update_dirty")
+COUNTS = ("enemies", "reserve", "archers", "wizards", "shots")
+
+
+class PhaseStats:
+    # durations of the last `window` calls of one phase, in seconds
+    def __init__(self, window):
+        self.samples = np.zeros(window)
+        self.calls = 0
+
+    def add(self, seconds):
+        self.samples[self.calls % len(self.samples)] = seconds
+        self.calls += 1
+
+    def summary(self):  # mean, p95 and max in ms over the window
+        samples = self.samples[:min(self.calls, len(self.samples))] * 1000
+        if len(samples) == 0:
+            return 0.0, 0.0, 0.0
+        return samples.mean(), np.percentile(samples, 95), samples.max()
+
+
+class Profiler:
+    # Times the hot phases of a Simulation and a Board by shadowing their methods with timed
+    # wrappers on the instance. Nothing is wrapped until attach() and detach() drops the
+    # wrappers again, so the game runs its plain methods whenever profiling is off.
+    def __init__(self, window=120, csv_path=None):
+        self.window = window
+        self.phases = {name: PhaseStats(window) for name in ("tick",) + SIMULATION_PHASES + BOARD_PHASES}
+        self.current = {}  # phase -> seconds spent since the last finished tick
+        self.counts = dict.fromkeys(COUNTS, 0)  # entity counts after the last tick
+        self.ticks = 0
+        self.attached = []  # (object, wrapped method names)
+
+        self.csv_file = None
+        self.csv_writer = None
+        if csv_path is not None:
+            new_file = not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0
+            self.csv_file = open(csv_path, "a", newline="")
+            self.csv_writer = csv.writer(self.csv_file)
+            if new_file:
+                self.csv_writer.writerow(("tick_count",) + tuple(self.phases) + COUNTS)
+
+    def probe(self, name, method):
+        stats = self.phases[name]
+        current = self.current
+        perf_counter = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            result = method(*args, **kwargs)
+            elapsed = perf_counter() - start
+            stats.add(elapsed)
+            current[name] = current.get(name, 0.0) + elapsed
+            return result
+        return timed
+
+    def attach(self, obj, names):
+        for name in names:
+            setattr(obj, name, self.probe(name, getattr(obj, name)))
+        self.attached.append((obj, names))
+
+    def attach_simulation(self, simulation):
+        self.attach(simulation, SIMULATION_PHASES)
+        tick = self.probe("tick", simulation.tick)
+
+        def tick_and_record():
+            tick()
+            self.end_tick(simulation)
+        simulation.tick = tick_and_record
+        self.attached.append((simulation, ("tick",)))
+
+    def attach_board(self, board):
+        self.attach(board, BOARD_PHASES)
+
+    def detach(self, obj=None):  # drop the probes from obj, or from everything when obj is None
+        for attached, names in self.attached:
+            if obj is None or attached is obj:
+                for name in names:
+                    attached.__dict__.pop(name, None)
+        self.attached = [(attached, names) for attached, names in self.attached
+                         if obj is not None and attached is not obj]
+
+    def end_tick(self, simulation):
+        self.ticks += 1
+        self.counts = {"enemies": simulation.enemies.count,
+                       "reserve": len(simulation.enemies_in_reserve),
+                       "archers": len(simulation.archers),
+                       "wizards": len(simulation.wizards),
+                       "shots": int(simulation.projectiles.in_flight(simulation.clock).sum())}
+        if self.csv_writer is not None:
+            self.csv_writer.writerow([simulation.tick_count]
+                                     + ["%.6f" % self.current.get(name, 0.0) for name in self.phases]
+                                     + [self.counts[name] for name in COUNTS])
+        self.current.clear()
+
+    def report(self):  # lines of text for the overlay
+        lines = ["%-20s %7s %7s %7s" % ("phase, ms", "mean", "p95", "max")]
+        for name, stats in self.phases.items():
+            if stats.calls:
+                lines.append("%-20s %7.3f %7.3f %7.3f" % ((name,) + stats.summary()))
+        lines.append("  ".join("%s %d" % item for item in self.counts.items()))
+        return lines
+
+    def close(self):
+        self.detach()
+        if self.csv_file is not None:
+            self.csv_file.close()
+            self.csv_file = None
+            self.csv_writer = None
@@ -0,0 +1,30 @@
+from stores import ArrayStore
+
+ARROW, FIREBALL = 0, 1  # kinds of projectiles, shot by archers and wizards
+
+
+class ProjectileStore(ArrayStore):
+    # Arrows and fireballs in flight. A projectile leaves its tower's square on the `fired`
+    # tick of Simulation.clock and hits its target enemy on the `arrival` tick if the
+    # target is still alive; target_index is the road square it was aimed at.
+    # Rows of landed projectiles stay until a launch finds the arrays full.
+    fields = ("kind", "target_uid", "damage", "fired", "arrival", "source_i", "source_j", "target_index")
+
+    def launch(self, clock, kind, target_uid, damage, arrival, sources, targets):  # arrays, targets are path indices
+        rows = len(target_uid)
+        if self.count + rows > self.capacity:
+            self.remove(self.arrival[:self.count] <= clock)
+            self.reserve(rows)
+        new = slice(self.count, self.count + rows)
+        self.kind[new] = kind
+        self.target_uid[new] = target_uid
+        self.damage[new] = damage
+        self.fired[new] = clock
+        self.arrival[new] = arrival
+        self.source_i[new] = sources[:, 0]
+        self.source_j[new] = sources[:, 1]
+        self.target_index[new] = targets
+        self.count += rows
+
+    def in_flight(self, clock):  # mask of the rows which have not landed before tick clock
+        return self.arrival[:self.count] >= clock
@@ -0,0 +1,110 @@
+import argparse
+import json
+import struct
+import time
+
+from simulation import Simulation
+
+# Input log: a header with the seed and balance parameters of the game, then one
+# fixed-size record per player input, stamped with Simulation.tick_count.
+MAGIC = b"TDRL"
+VERSION = 1
+HEADER = struct.Struct("<4sHQI")  # magic, version, seed, length of the params JSON
+RECORD = struct.Struct("<IBhh")  # tick, action, coordinates of the tower place or road square
+SEED = struct.Struct("<Q")  # follows a restart record
+
+ACTIONS = ["archer", "wizard", "upgrade", "restart", "end", "block", "unblock"]
+
+
+class InputRecorder:
+    def __init__(self, path, simulation):
+        self.simulation = simulation
+        self.file = open(path, "wb")
+        params = json.dumps(simulation.params).encode()
+        self.file.write(HEADER.pack(MAGIC, VERSION, simulation.seed, len(params)))
+        self.file.write(params)
+        simulation.recorder = self
+
+    def record(self, tick, action, coord=(0, 0), seed=None):
+        self.file.write(RECORD.pack(tick, ACTIONS.index(action), coord[0], coord[1]))
+        if action == "restart":
+            self.file.write(SEED.pack(seed))
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.record(self.simulation.tick_count, "end")
+        self.file.close()
+        self.simulation.recorder = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def read_log(path):  # return seed, params and the list of (tick, action, coord, seed) records
+    with open(path, "rb") as log:
+        data = log.read()
+
+    magic, version, seed, params_length = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(path + " is not an input log")
+    if version != VERSION:
+        raise ValueError("Unsupported input log version %d" % version)
+    offset = HEADER.size
+    params = json.loads(data[offset:offset + params_length])
+    offset += params_length
+
+    records = []
+    while offset < len(data):
+        tick, action, i, j = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        record_seed = None
+        if ACTIONS[action] == "restart":
+            record_seed, = SEED.unpack_from(data, offset)
+            offset += SEED.size
+        records.append((tick, ACTIONS[action], [i, j], record_seed))
+    return seed, params, records
+
+
+def advance(simulation, tick):  # run the simulation up to tick_count == tick, or until the castle falls
+    while simulation.tick_count < tick and not simulation.game_over:
+        simulation.step(tick - simulation.tick_count)
+
+
+def replay(path):  # re-run a recorded game headless at full speed, return the final Simulation
+    seed, params, records = read_log(path)
+    simulation = Simulation(seed=seed, **params)
+    for tick, action, coord, record_seed in records:
+        advance(simulation, tick)
+        if action == "archer":
+            simulation.buy_archer(coord)
+        elif action == "wizard":
+            simulation.buy_wizard(coord)
+        elif action == "upgrade":
+            simulation.upgrade_archer(coord)
+        elif action == "block":
+            simulation.block_square(coord)
+        elif action == "unblock":
+            simulation.unblock_square(coord)
+        elif action == "restart":
+            simulation.restart(record_seed)
+    return simulation
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded game without rendering.")
+    parser.add_argument("log", help="input log written by main.py --record")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    simulation = replay(args.log)
+    elapsed = time.perf_counter() - start
+    print("wave %d, castle HP %d, money %d, %d ticks replayed in %.3f s"
+          % (simulation.wave_level, simulation.castleHP, simulation.money_count, simulation.tick_count, elapsed))
+
+
+if __name__ == "__main__":
+    main()
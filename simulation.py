@@ -0,0 +1,410 @@
+import heapq
+from collections import deque
+
+import numpy as np
+
+import maps
+from enemies import EnemyStore
+from flowfield import FlowField
+from projectiles import ARROW, FIREBALL, ProjectileStore
+
+MOVE, LAND, FIRE, WAVE, SPAWN = range(5)  # kinds of events, events of one tick are handled in this order
+
+
+class Tower:
+    __slots__ = ("position", "level", "range", "force", "upgrade_cost", "building_cost")
+
+    def __init__(self, coord, level, range_per_level=4, force_per_level=20):
+        self.position = coord
+        self.level = level
+        self.range = range_per_level * level  # 4, 8, 12 squares
+        self.force = force_per_level * level  # 20, 40, 60 damage
+        self.upgrade_cost = level * 50  # 50, 100, 150 coins
+        self.building_cost = level * 100  # 100, 200, 300 coins
+
+    def level_up(self):
+        self.level += 1
+        self.range = 10 * self.level  # 10, 20, 30 pixels
+        self.force = 10 * self.level  # 20, 40, 60 damage
+        self.upgrade_cost = self.level * 50  # 50, 100, 150 coins
+
+    def make_damage(self) -> int:
+        return self.force
+
+
+class Archer(Tower):
+    __slots__ = ()
+
+
+class Wizard(Tower):
+    __slots__ = ()
+
+
+class Simulation:
+    # Game state and tick logic without any Qt dependency. Board renders it and
+    # forwards player input; headless tools drive it directly through step().
+    max_possible_level = 7  # max possible level of enemies
+
+    def __init__(self, seed=None, **params):  # params override the balance attributes below, e.g. fire_delay=2
+        self.map_path = maps.DEFAULT_MAP  # map file, see maps.py
+
+        self.archer_cost = 150
+        self.wizard_cost = 200
+        self.archer_upgrade_costs = [500, 2000]  # cost of the 2 and 3 archer level
+        self.max_tower_level = 3
+        self.tower_range_per_level = 4
+        self.tower_force_per_level = 20
+
+        self.fire_delay = 3  # count of iteration between towers' fire
+        self.spawn_delay = 4  # count of iteration between spawns in a wave
+        self.first_wave_delay = 80  # count of iteration before 2 wave
+        self.units_in_first_wave = 4
+        self.arrow_speed = 2  # squares per iteration
+        self.fireball_speed = 1
+
+        for name, value in params.items():
+            if not hasattr(self, name):
+                raise AttributeError("Simulation has no parameter " + repr(name))
+            setattr(self, name, value)
+        self.params = params
+        self.recorder = None  # replay.InputRecorder which logs player inputs
+
+        self.map = maps.load_map(self.map_path)
+        self.tower_places = [list(place) for place in self.map.tower_places]
+        self.road = [list(square) for square in self.map.road]  # every road square, the listed road first
+        self.road_index = {tuple(coord): i for i, coord in enumerate(self.road)}  # position -> path index
+        self.road_array = np.array(self.road, dtype=np.int32).reshape(-1, 2)  # path index -> position
+        self.spawn_points = [self.road_index[square] for square in self.map.spawns]  # path indices
+        self.flow = FlowField(self.map)
+        self.next_step = self.flow.next_cell  # path index -> next path index, updated in place
+
+        self.coverage = {}  # (tower place, tower level) -> mask of road path indices in the tower's range
+        for place in self.tower_places:
+            for level in range(1, self.max_tower_level + 1):
+                self.tower_coverage_row(place, level)
+
+        self.restart(seed)
+
+    def restart(self, seed=None):  # a new game, seeded with a fresh seed when none is given
+        if seed is None:
+            seed = np.random.SeedSequence().entropy % 2 ** 64
+        if self.recorder is not None:
+            self.recorder.record(self.tick_count, "restart", seed=seed)
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+
+        self.enemies = EnemyStore()
+        self.enemies_in_reserve = deque()  # levels of enemies which were generated by wave
+                                      # and now are waiting for their turn to appear
+        self.wizards = []
+        self.archers = []
+        self.projectiles = ProjectileStore()  # arrows and fireballs in flight
+        self.update_towers()
+
+        self.clock = 0  # ticks played after start_delay, the time of the events
+        self.events = []  # heap of (clock, kind, velocity of the movers, landing clock or 0)
+        self.scheduled = set()  # (kind, velocity) of the events in the heap, one of each at a time
+        self.moved = False  # some enemies moved on the last tick
+        self.schedule(0, WAVE)
+
+        self.wave_delay = self.first_wave_delay  # count of iteration before between waves
+        self.start_delay = 50  # delay before starting of waves
+
+        self.castleHP = 1000
+        self.castlePosition = list(self.map.castle)
+        self.castle_index = self.road_index[tuple(self.castlePosition)]
+        self.flow.clear()  # blocked squares are part of the game
+        self.money_count = 1000
+        self.game_over = False  # castle HP==0, end of game
+
+        self.wave_level = 0
+        self.tick_count = 0
+
+    # UNITS AND TOWERS LOGIC
+    def enemy_wave(self):  # create enemies in accordance with wave_level
+        self.wave_level += 1
+        units_count = self.units_in_first_wave * self.wave_level  # units in wave: 4, 8, 12, 16...
+        low_units_level = self.wave_level % self.max_possible_level
+        enemy_levels = self.rng.integers(low_units_level,
+                                         high=min(self.wave_level + 1, self.max_possible_level), size=units_count)
+        self.enemies_in_reserve.extend(enemy_levels.tolist())
+
+    def add_enemy_to_fight(self):
+        spawn = self.spawn_points[0]
+        if len(self.spawn_points) > 1:
+            spawn = self.spawn_points[self.rng.integers(len(self.spawn_points))]
+        self.enemies.spawn(self.enemies_in_reserve.popleft(), spawn)
+
+    def enemy_positions(self):  # (count, 2) array of enemies' squares
+        return self.road_array[self.enemies.path_index[:self.enemies.count]]
+
+    def enemy_previous_positions(self):  # squares of the enemies before the last tick
+        return self.road_array[self.enemies.previous_path_index[:self.enemies.count]]
+
+    def tower_coverage_row(self, coord, level):
+        key = (tuple(coord), level)
+        row = self.coverage.get(key)
+        if row is None:
+            tower_range = self.tower_range_per_level * level
+            delta = self.road_array - np.array(coord, dtype=np.int32)
+            row = (delta ** 2).sum(axis=1) <= tower_range ** 2
+            self.coverage[key] = row
+        return row
+
+    def update_towers(self):  # rebuild the tower arrays used for targeting, archers go first
+        towers = self.archers + self.wizards
+        self.tower_force = np.array([tower.make_damage() for tower in towers], dtype=np.int32)
+        self.tower_positions = np.array([tower.position for tower in towers], dtype=np.int32).reshape(-1, 2)
+        self.tower_coverage = np.array([self.tower_coverage_row(tower.position, tower.level) for tower in towers],
+                                       dtype=bool).reshape(len(towers), len(self.road))
+        self.tower_kind = np.where(np.arange(len(towers)) < len(self.archers), ARROW, FIREBALL).astype(np.int32)
+
+        # ticks a projectile of each tower flies to each road square, at least one
+        distance = np.sqrt(((self.road_array[None, :, :] - self.tower_positions[:, None, :]) ** 2).sum(axis=2))
+        speed = np.where(self.tower_kind == ARROW, self.arrow_speed, self.fireball_speed)[:, None]
+        self.tower_flight = np.maximum(np.ceil(distance / speed), 1).astype(np.int32)
+
+    def targets_in_range(self):  # (towers, enemies) mask of enemies in each tower's range
+        return self.tower_coverage[:, self.enemies.path_index[:self.enemies.count]]
+
+    def shelling(self):  # towers launch projectiles at the enemies in their range
+        n = self.enemies.count
+        if n == 0 or len(self.tower_force) == 0:
+            return
+        in_range = self.targets_in_range()
+        archers_range = in_range[:len(self.archers)]
+        wizards_range = in_range[len(self.archers):]
+
+        # archers shoot the first enemy in range, wizards throw a fireball at every enemy in range
+        shooting = np.flatnonzero(archers_range.any(axis=1))
+        targets = archers_range[shooting].argmax(axis=1)
+        wizards, wizards_targets = np.nonzero(wizards_range)
+        shooting = np.concatenate((shooting, wizards + len(self.archers)))
+        targets = np.concatenate((targets, wizards_targets))
+        if len(shooting) == 0:
+            return
+
+        target_index = self.enemies.path_index[:n][targets]
+        arrival = self.clock + self.tower_flight[shooting, target_index]
+        self.projectiles.launch(self.clock, self.tower_kind[shooting], self.enemies.uid[:n][targets],
+                                self.tower_force[shooting], arrival, self.tower_positions[shooting], target_index)
+        for clock in set(arrival.tolist()):
+            self.schedule(clock, LAND, clock)
+
+    def projectiles_land(self):  # hits of the projectiles which arrive on this tick
+        n = self.enemies.count
+        if n == 0:
+            return
+        shots = self.projectiles
+        arrived = shots.arrival[:shots.count] == self.clock
+
+        # a projectile hits its target if it is still alive, uids are sorted in spawn order
+        uid = self.enemies.uid[:n]
+        target_uid = shots.target_uid[:shots.count][arrived]
+        rows = np.minimum(uid.searchsorted(target_uid), n - 1)
+        damage = np.where(uid[rows] == target_uid, shots.damage[:shots.count][arrived], 0)
+        hp = self.enemies.HP[:n]
+        np.subtract.at(hp, rows, damage)
+        if hp.min() <= 0:  # also collects the level 0 enemies, which spawn dead
+            np.maximum(hp, 0, out=hp)
+            self.get_money()
+
+    def units_move(self, velocity):  # enemies of one velocity step to the next square of the flow field
+        n = self.enemies.count
+        path_index = self.enemies.path_index[:n]
+        due = self.enemies.velocity[:n] == velocity
+        path_index[due] = self.next_step[path_index[due]]
+        self.moved = True
+        return due.any()
+
+    def at_castle(self):
+        return self.enemies.path_index[:self.enemies.count] == self.castle_index
+
+    def units_destroy(self):
+        self.enemies.remove(self.at_castle())
+
+    def castle_damage(self):
+        self.castleHP -= int(self.enemies.force[:self.enemies.count][self.at_castle()].sum())
+        if self.castleHP < 0:
+            self.castleHP = 0
+
+    def castle_is_alive(self) -> bool:
+        if self.castleHP <= 0:
+            return False
+        else:
+            return True
+
+    # MONEY
+    def get_money(self):
+        dead = self.enemies.HP[:self.enemies.count] == 0
+        if dead.any():
+            self.money_count += int(self.enemies.money_award[:self.enemies.count][dead].sum())
+            self.enemies.remove(dead)
+
+    # PURCHASES
+    def archers_coordinates(self):
+        answer = []
+        for i in self.archers:
+            answer.append(i.position)
+        return answer
+
+    def towers_coordinates(self):
+        return self.archers_coordinates() + [wizard.position for wizard in self.wizards]
+
+    def buy_archer(self, coord) -> bool:
+        if self.money_count < self.archer_cost:
+            return False
+        self.money_count -= self.archer_cost
+        self.record_input("archer", coord)
+        self.archers.append(self.make_tower(Archer, coord, 1))
+        self.update_towers()
+        return True
+
+    def buy_wizard(self, coord) -> bool:
+        if self.money_count < self.wizard_cost:
+            return False
+        self.money_count -= self.wizard_cost
+        self.record_input("wizard", coord)
+        self.wizards.append(self.make_tower(Wizard, coord, 1))
+        self.update_towers()
+        return True
+
+    def record_input(self, action, coord):
+        if self.recorder is not None:
+            self.recorder.record(self.tick_count, action, coord)
+
+    def make_tower(self, tower_type, coord, level):
+        return tower_type(coord, level, self.tower_range_per_level, self.tower_force_per_level)
+
+    def archer_upgrade_cost(self, level):  # cost of upgrading an archer from level to level + 1
+        if 1 <= level <= len(self.archer_upgrade_costs):
+            return self.archer_upgrade_costs[level - 1]
+        return None
+
+    def can_upgrade_archer(self, coord) -> bool:
+        if coord not in self.archers_coordinates():
+            return False
+        level = self.archers[self.archers_coordinates().index(coord)].level
+        cost = self.archer_upgrade_cost(level)
+        return level < self.max_tower_level and cost is not None and self.money_count >= cost
+
+    def upgrade_archer(self, coord) -> bool:
+        if not self.can_upgrade_archer(coord):
+            return False
+        index = self.archers_coordinates().index(coord)
+        level = self.archers[index].level
+        self.money_count -= self.archer_upgrade_cost(level)
+        self.record_input("upgrade", coord)
+        del self.archers[index]
+        self.archers.append(self.make_tower(Archer, coord, level + 1))
+        self.update_towers()
+        return True
+
+    # ROAD BLOCKS
+    def block_square(self, coord) -> bool:  # enemies walk around a blocked road square if they can
+        cell = self.road_index.get(tuple(coord))
+        if cell is None or cell == self.castle_index or self.flow.blocked[cell]:
+            return False
+        self.record_input("block", coord)
+        self.flow.block(coord)
+        return True
+
+    def unblock_square(self, coord) -> bool:
+        cell = self.road_index.get(tuple(coord))
+        if cell is None or not self.flow.blocked[cell]:
+            return False
+        self.record_input("unblock", coord)
+        self.flow.unblock(coord)
+        return True
+
+    def blocked_squares(self):
+        return [self.road[cell] for cell in np.flatnonzero(self.flow.blocked).tolist()]
+
+    # EVENTS
+    def schedule(self, clock, kind, velocity=0):  # add an event unless one of its kind is already waiting
+        if (kind, velocity) not in self.scheduled:
+            self.scheduled.add((kind, velocity))
+            heapq.heappush(self.events, (clock, kind, velocity))
+
+    def next_move(self, velocity, clock):  # first clock from clock on at which enemies of velocity move
+        cycle = self.max_possible_level + 1  # enemies move on ticks 1..cycle of a cycle when velocity divides it
+        while clock != 0 and ((clock - 1) % cycle + 1) % velocity != 0:
+            clock += 1
+        return clock
+
+    def next_multiple(self, delay, clock):  # first clock from clock on which is a multiple of delay
+        return -(-clock // delay) * delay
+
+    def enemies_arrived(self):  # spawns keep the movers and the towers' fire scheduled
+        velocities = np.unique(self.enemies.velocity[:self.enemies.count]).tolist()
+        for velocity in velocities:
+            self.schedule(self.next_move(velocity, self.clock + 1), MOVE, velocity)
+        if velocities:
+            self.schedule(self.next_multiple(self.fire_delay, self.clock + 1), FIRE)
+
+    def handle(self, kind, velocity):
+        clock = self.clock
+        if kind == MOVE:
+            if self.units_move(velocity):
+                self.schedule(self.next_move(velocity, clock + 1), MOVE, velocity)
+            if not (self.events and self.events[0][:2] == (clock, MOVE)):  # after the last movers of the tick
+                self.castle_damage()
+                self.units_destroy()
+        elif kind == LAND:
+            self.projectiles_land()
+        elif kind == FIRE:
+            self.shelling()
+            if self.enemies.count:
+                self.schedule(clock + self.fire_delay, FIRE)
+        elif kind == WAVE:
+            self.enemy_wave()
+            self.schedule(clock + self.wave_delay, WAVE)
+            if self.enemies_in_reserve:
+                self.schedule(self.next_multiple(self.spawn_delay, clock), SPAWN)
+        elif kind == SPAWN:
+            self.add_enemy_to_fight()
+            self.enemies_arrived()
+            if self.enemies_in_reserve:
+                self.schedule(clock + self.spawn_delay, SPAWN)
+
+    # TICKS
+    def tick(self):
+        if not (self.castle_is_alive()):
+            self.game_over = True
+            return
+
+        self.tick_count += 1
+
+        if self.start_delay != 0:
+            self.start_delay -= 1
+            return
+
+        if self.moved:  # the enemies that moved on the last tick stand on their squares now
+            self.enemies.previous_path_index[:self.enemies.count] = self.enemies.path_index[:self.enemies.count]
+            self.moved = False
+        events = self.events
+        while events and events[0][0] == self.clock:
+            clock, kind, velocity = heapq.heappop(events)
+            self.scheduled.discard((kind, velocity))
+            self.handle(kind, velocity)
+        self.clock += 1
+
+    def idle_ticks(self):  # ticks from now on in which nothing but the clock would change
+        idle = self.start_delay
+        if self.enemies.count == 0 and not self.enemies_in_reserve and not self.moved:
+            idle += self.events[0][0] - self.clock
+        return idle
+
+    def step(self, n=1):  # advance the game by n ticks, stops early when the castle falls
+        end = self.tick_count + n
+        while self.tick_count < end:
+            idle = min(self.idle_ticks(), end - self.tick_count)
+            if idle > 0 and self.castle_is_alive():  # jump over the delay before the game and empty gaps
+                delay = min(idle, self.start_delay)
+                self.start_delay -= delay
+                self.clock += idle - delay
+                self.tick_count += idle
+                continue
+            self.tick()
+            if self.game_over:
+                break
@@ -0,0 +1,120 @@
+import json
+import os
+import struct
+from collections import deque
+
+import numpy as np
+
+from enemies import EnemyStore
+from projectiles import ProjectileStore
+from simulation import Simulation, Archer, Wizard
+
+# Snapshot file: a header, a JSON block with the scalar state and the layout of the
+# arrays, then the raw arrays aligned to ALIGNMENT bytes so they can be memory-mapped.
+MAGIC = b"TDSS"
+VERSION = 4
+HEADER = struct.Struct("<4sHI")  # magic, version, length of the JSON block
+ALIGNMENT = 64
+
+SCALARS = ("seed", "clock", "moved", "wave_delay", "start_delay", "castleHP", "castlePosition", "money_count",
+           "game_over", "wave_level", "tick_count")
+TOWER_TYPES = [Archer, Wizard]  # tower kind column of the towers array
+
+
+def state_arrays(simulation):
+    arrays = {name: getattr(simulation.enemies, name)[:simulation.enemies.count] for name in EnemyStore.fields}
+    arrays["enemies_in_reserve"] = np.array(simulation.enemies_in_reserve, dtype=np.int32)
+    towers = [(TOWER_TYPES.index(type(tower)), tower.position[0], tower.position[1], tower.level)
+              for tower in simulation.archers + simulation.wizards]
+    arrays["towers"] = np.array(towers, dtype=np.int32).reshape(-1, 4)
+    flying = simulation.projectiles.in_flight(simulation.clock)
+    for name in ProjectileStore.fields:
+        arrays["projectile_" + name] = getattr(simulation.projectiles, name)[:simulation.projectiles.count][flying]
+    return arrays
+
+
+def state_meta(simulation):  # the state which is not in state_arrays, as JSON values
+    meta = {name: getattr(simulation, name) for name in SCALARS}
+    meta["params"] = simulation.params
+    meta["rng"] = simulation.rng.bit_generator.state
+    meta["blocked"] = simulation.blocked_squares()
+    meta["events"] = simulation.events
+    meta["next_uid"] = simulation.enemies.next_uid
+    return meta
+
+
+def save_snapshot(simulation, path):
+    arrays = state_arrays(simulation)
+    meta = state_meta(simulation)
+
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        layout[name] = [array.dtype.str, list(array.shape), offset]
+        offset += array.nbytes
+    meta["arrays"] = layout
+
+    meta_bytes = json.dumps(meta).encode()
+    data_start = -(-(HEADER.size + len(meta_bytes)) // ALIGNMENT) * ALIGNMENT
+    # the arrays may be mapped from the file at path itself, so it is replaced, not rewritten
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as snapshot:
+        snapshot.write(HEADER.pack(MAGIC, VERSION, len(meta_bytes)))
+        snapshot.write(meta_bytes)
+        for name, array in arrays.items():
+            snapshot.seek(data_start + layout[name][2])
+            snapshot.write(np.ascontiguousarray(array).tobytes())
+    os.replace(temporary, path)
+
+
+def read_snapshot(path, mmap_mode="c"):  # return the scalar state and the arrays, mapped with mmap_mode
+    with open(path, "rb") as snapshot:
+        magic, version, meta_length = HEADER.unpack(snapshot.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(path + " is not a snapshot")
+        if version != VERSION:
+            raise ValueError("Unsupported snapshot version %d" % version)
+        meta = json.loads(snapshot.read(meta_length))
+
+    data_start = -(-(HEADER.size + meta_length) // ALIGNMENT) * ALIGNMENT
+    arrays = {}
+    for name, (dtype, shape, offset) in meta["arrays"].items():
+        if np.prod(shape) == 0:
+            arrays[name] = np.zeros(shape, dtype=dtype)
+        elif mmap_mode is None:
+            arrays[name] = np.fromfile(path, dtype=dtype, count=int(np.prod(shape)),
+                                       offset=data_start + offset).reshape(shape)
+        else:
+            arrays[name] = np.memmap(path, dtype=dtype, mode=mmap_mode, offset=data_start + offset, shape=tuple(shape))
+    return meta, arrays
+
+
+def load_snapshot(path, mmap_mode="c"):
+    # with the default copy-on-write mapping many games can be forked from one file, each
+    # one reads the shared pages and only copies the pages it changes
+    meta, arrays = read_snapshot(path, mmap_mode)
+    simulation = Simulation(meta["seed"], **meta["params"])
+    for name in SCALARS:
+        setattr(simulation, name, meta[name])
+    simulation.rng.bit_generator.state = meta["rng"]
+    for square in meta["blocked"]:
+        simulation.flow.block(square)
+    simulation.events = []
+    simulation.scheduled = set()
+    for clock, kind, velocity in meta["events"]:
+        simulation.schedule(clock, kind, velocity)
+
+    simulation.enemies = EnemyStore.from_arrays(arrays)
+    simulation.enemies.next_uid = meta["next_uid"]
+    simulation.projectiles = ProjectileStore.from_arrays({name: arrays["projectile_" + name]
+                                                          for name in ProjectileStore.fields})
+    simulation.enemies_in_reserve = deque(arrays["enemies_in_reserve"].tolist())
+    for kind, i, j, level in arrays["towers"].tolist():
+        tower = simulation.make_tower(TOWER_TYPES[kind], [i, j], level)
+        if kind == TOWER_TYPES.index(Archer):
+            simulation.archers.append(tower)
+        else:
+            simulation.wizards.append(tower)
+    simulation.update_towers()
+    return simulation
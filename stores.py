@@ -0,0 +1,48 @@
+import numpy as np
+
+
+class ArrayStore:
+    # Struct-of-arrays storage: one preallocated int32 array per name in fields, row i of
+    # every array describes the same item. Rows [0, count) are in use and kept in the
+    # order they were added; the arrays double when they are full.
+    fields = ()
+
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.capacity = capacity
+        for name in self.fields:
+            setattr(self, name, np.zeros(capacity, dtype=np.int32))
+
+    @classmethod
+    def from_arrays(cls, arrays):  # wrap existing field arrays, e.g. memory-mapped ones, without copying
+        store = cls(0)
+        for name in cls.fields:
+            setattr(store, name, arrays[name])
+        store.count = store.capacity = len(arrays[cls.fields[0]])
+        return store
+
+    def __len__(self):
+        return self.count
+
+    def grow(self, capacity):
+        for name in self.fields:
+            array = np.zeros(capacity, dtype=np.int32)
+            array[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    def reserve(self, rows):  # make room for rows more items
+        if self.count + rows > self.capacity:
+            self.grow(max(2 * self.capacity, self.count + rows, 64))
+
+    def remove(self, mask):  # drop the rows where mask is True, the order of the rest is kept
+        if not mask.any():
+            return
+        keep = np.flatnonzero(~mask)
+        for name in self.fields:
+            array = getattr(self, name)
+            array[:len(keep)] = array[keep]
+        self.count = len(keep)
+
+    def clear(self):
+        self.count = 0
@@ -0,0 +1,126 @@
+import argparse
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import maps
+from simulation import Simulation
+
+# balance parameters of Simulation which can be swept, with the game defaults
+SWEEP_PARAMETERS = {
+    "units_in_first_wave": [4],
+    "first_wave_delay": [80],  # wave_delay of the game
+    "spawn_delay": [4],
+    "fire_delay": [3],
+    "archer_cost": [150],
+    "wizard_cost": [200],
+    "archer_upgrade_costs": [[500, 2000]],
+    "tower_range_per_level": [4],
+    "tower_force_per_level": [20],
+    "map_path": [maps.DEFAULT_MAP],  # layouts refer to the tower places of the map
+}
+
+# a layout is a build order over Simulation.tower_places: ["archer" | "wizard" | "upgrade", place index]
+DEFAULT_LAYOUTS = [
+    [],
+    [["archer", 1], ["archer", 3]],
+    [["archer", 1], ["wizard", 3], ["upgrade", 1]],
+]
+
+
+def make_configurations(grid):
+    grid = dict(grid)
+    layouts = grid.pop("layouts", DEFAULT_LAYOUTS)
+    seeds = grid.pop("seeds", [0])
+    for name in grid:
+        if name not in SWEEP_PARAMETERS:
+            raise ValueError("Unknown sweep parameter " + repr(name))
+    values = {name: grid.get(name, default) for name, default in SWEEP_PARAMETERS.items()}
+
+    configurations = []
+    for combination in itertools.product(*values.values(), layouts, seeds):
+        params = dict(zip(values.keys(), combination[:-2]))
+        configurations.append({"params": params, "layout": combination[-2], "seed": combination[-1]})
+    return configurations
+
+
+def apply_action(sim, action) -> bool:  # try to perform one step of a layout, False if it is not affordable yet
+    kind, place = action
+    coord = sim.tower_places[place]
+    if kind == "archer":
+        return sim.buy_archer(coord)
+    elif kind == "wizard":
+        return sim.buy_wizard(coord)
+    elif kind == "upgrade":
+        return sim.upgrade_archer(coord)
+    raise ValueError("Unknown layout action " + repr(kind))
+
+
+def run_game(configuration, max_ticks, sample_every):
+    sim = Simulation(configuration["seed"], **configuration["params"])
+    pending = list(configuration["layout"])
+
+    samples = max_ticks // sample_every + 1
+    castle_hp = np.empty(samples, dtype=np.int32)
+    money = np.empty(samples, dtype=np.int64)
+
+    for tick in range(max_ticks + 1):
+        if tick % sample_every == 0:
+            castle_hp[tick // sample_every] = sim.castleHP
+            money[tick // sample_every] = sim.money_count
+        if sim.game_over:
+            castle_hp[tick // sample_every + 1:] = sim.castleHP
+            money[tick // sample_every + 1:] = sim.money_count
+            break
+        while pending and apply_action(sim, pending[0]):
+            pending.pop(0)
+        sim.tick()
+
+    return {"wave_reached": sim.wave_level, "ticks": sim.tick_count, "castle_hp": castle_hp, "money": money}
+
+
+def run_sweep(configurations, max_ticks=20000, sample_every=10, workers=None):
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(configurations) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(run_game, configurations,
+                                    itertools.repeat(max_ticks), itertools.repeat(sample_every),
+                                    chunksize=chunksize))
+
+    columns = {name: np.array([c["params"][name] for c in configurations]) for name in SWEEP_PARAMETERS}
+    columns["layout"] = np.array([json.dumps(c["layout"]) for c in configurations])
+    columns["seed"] = np.array([c["seed"] for c in configurations])
+    columns["wave_reached"] = np.array([r["wave_reached"] for r in results])
+    columns["ticks"] = np.array([r["ticks"] for r in results])
+    columns["castle_hp"] = np.stack([r["castle_hp"] for r in results])
+    columns["money"] = np.stack([r["money"] for r in results])
+    columns["sample_every"] = np.array(sample_every)
+    return columns
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run headless games over a grid of balance parameters.")
+    parser.add_argument("grid", nargs="?",
+                        help="JSON file mapping parameter names, 'layouts' and 'seeds' to lists of values")
+    parser.add_argument("-o", "--output", default="sweep.npz", help="columnar .npz file with the results")
+    parser.add_argument("--max-ticks", type=int, default=20000)
+    parser.add_argument("--sample-every", type=int, default=10, help="ticks between castle HP / money samples")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes, all cores by default")
+    args = parser.parse_args()
+
+    grid = {}
+    if args.grid is not None:
+        with open(args.grid) as grid_file:
+            grid = json.load(grid_file)
+
+    configurations = make_configurations(grid)
+    columns = run_sweep(configurations, args.max_ticks, args.sample_every, args.workers)
+    np.savez_compressed(args.output, **columns)
+    print("%d games written to %s" % (len(configurations), args.output))
+
+
+if __name__ == "__main__":
+    main()